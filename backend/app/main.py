@@ -2,11 +2,17 @@
 FastAPI application — Dental Appointment Orchestration API.
 """
 import sys, os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# `python -m uvicorn app.main:app` from backend/ already has it on sys.path;
+# only add it for other entry points so imports don't scan it twice.
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
 
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from config import FRONTEND_URL
+from fastapi.responses import ORJSONResponse, Response
+import orjson
+from config import FRONTEND_URL, ENABLE_CORS_MIDDLEWARE
 from routers.patients import router as patients_router
 from routers.triage import router as triage_router
 from routers.slots import router as slots_router
@@ -19,32 +25,44 @@ from routers.onboarding import router as onboarding_router
 from core.rate_limit import RateLimitDependency, get_ip
 from config import RATE_LIMIT_LOGIN
 
+class _ORJSONResponse(ORJSONResponse):
+    """orjson-encoded responses; int keys are stringified like stdlib json does."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 app = FastAPI(
     title="Bronn AI — Appointment Orchestration API",
     version="2.0.0",
     description="AI-driven dental scheduling with multi-tenant auth and onboarding",
+    default_response_class=_ORJSONResponse,
 )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[FRONTEND_URL, "http://13.203.166.158", "http://13.203.166.158:3000", "https://bronn.dev", "http://bronn.dev", "http://localhost:3000", "http://localhost:3001"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Behind a same-origin proxy, CORS is handled there and this middleware
+# frame is dropped from every request.
+if ENABLE_CORS_MIDDLEWARE:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[FRONTEND_URL, "http://13.203.166.158", "http://13.203.166.158:3000", "https://bronn.dev", "http://bronn.dev", "http://localhost:3000", "http://localhost:3001"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 
 # ── Public routes ────────────────────────────────────────────────────────────
-# ── Public routes ────────────────────────────────────────────────────────────
+# One limiter instance shared by both auth routers (same "auth_lim" bucket)
+auth_limit = [Depends(RateLimitDependency(limit=RATE_LIMIT_LOGIN, window=60, scope_func=get_ip, key_prefix="auth_lim"))]
+
 app.include_router(
     auth_router, 
     prefix="/api/auth", 
     tags=["Auth"],
-    dependencies=[Depends(RateLimitDependency(limit=RATE_LIMIT_LOGIN, window=60, scope_func=get_ip, key_prefix="auth_lim"))]
+    dependencies=auth_limit
 )
 app.include_router(
     patient_auth_router,
     prefix="",
-    dependencies=[Depends(RateLimitDependency(limit=RATE_LIMIT_LOGIN, window=60, scope_func=get_ip, key_prefix="auth_lim"))]
+    dependencies=auth_limit
 )
 
 # ── Protected routes ─────────────────────────────────────────────────────────
@@ -62,6 +80,14 @@ app.include_router(dashboard_router, prefix="/api/dashboard", tags=["Dashboard"]
 app.include_router(settings_router, prefix="/api/settings", tags=["Settings"], dependencies=global_limit)
 
 
+# Liveness probes hit this constantly: serve a pre-serialized body from the
+# event loop instead of a threadpool hop + per-call JSON encoding. A fresh
+# Response is still built per call because middleware mutates its headers.
+_HEALTH_BODY = orjson.dumps(
+    {"status": "ok", "service": "Bronn AI — Appointment Orchestration API", "version": "2.0.0"}
+)
+
+
 @app.get("/api/health")
-def health():
-    return {"status": "ok", "service": "Bronn AI — Appointment Orchestration API", "version": "2.0.0"}
+async def health():
+    return Response(content=_HEALTH_BODY, media_type="application/json")
@@ -36,6 +36,8 @@ SCHEDULE_LOOKAHEAD_DAYS = 14
 
 # ── CORS ────────────────────────────────────────────────────────────────────
 FRONTEND_URL: str = os.getenv("FRONTEND_URL", "https://bronn.dev")
+# Set to "0" when a same-origin reverse proxy terminates CORS/preflight.
+ENABLE_CORS_MIDDLEWARE: bool = os.getenv("ENABLE_CORS_MIDDLEWARE", "1") == "1"
 
 # ── JWT Authentication ──────────────────────────────────────────────────────
 JWT_SECRET: str = os.getenv("JWT_SECRET", "bronn-dev-jwt-secret-change-in-production")
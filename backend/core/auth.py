@@ -1,26 +1,62 @@
 """
 Core authentication utilities — password hashing, JWT token management.
 """
-import uuid
+import base64
+import binascii
+import hmac
+import re
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import bcrypt
 import jwt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 
 from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRY_MINUTES
 
 
 # ── Password Hashing ────────────────────────────────────────────────────────
 
+# New hashes are argon2id (OWASP baseline params) — far cheaper per login
+# than bcrypt while staying memory-hard. Legacy bcrypt hashes still verify
+# and are upgraded on the next successful login.
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=19 * 1024, parallelism=1)
+
+
+def _is_bcrypt_hash(hashed: str) -> bool:
+    return hashed.startswith(("$2a$", "$2b$", "$2y$"))
+
+
 def hash_password(plain: str) -> str:
-    """Hash a plaintext password using bcrypt."""
-    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    """Hash a plaintext password using argon2id."""
+    return _password_hasher.hash(plain)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    """Verify a plaintext password against a bcrypt hash."""
-    return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+    """Verify a plaintext password against an argon2id or legacy bcrypt hash."""
+    if _is_bcrypt_hash(hashed):
+        return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+    try:
+        return _password_hasher.verify(hashed, plain)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed: str) -> bool:
+    """True if the stored hash is legacy bcrypt or uses outdated argon2 params."""
+    if _is_bcrypt_hash(hashed):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(hashed)
+    except InvalidHashError:
+        return True
+
+
+_PW_STRENGTH_RE = re.compile(r"^(?=.*[A-Z])(?=.*[a-z])(?=.*\d).{8,}$", re.DOTALL)
 
 
 def validate_password_strength(password: str) -> Optional[str]:
@@ -28,19 +64,90 @@ def validate_password_strength(password: str) -> Optional[str]:
     Validate password meets minimum strength requirements.
     Returns error message string if invalid, None if valid.
     """
+    if _PW_STRENGTH_RE.match(password):
+        return None
     if len(password) < 8:
         return "Password must be at least 8 characters long"
-    if not any(c.isupper() for c in password):
+
+    # Single scan to pick the first missing character class
+    has_upper = has_lower = has_digit = False
+    for c in password:
+        if c.isupper():
+            has_upper = True
+        elif c.islower():
+            has_lower = True
+        elif c.isdigit():
+            has_digit = True
+    if not has_upper:
         return "Password must contain at least one uppercase letter"
-    if not any(c.islower() for c in password):
+    if not has_lower:
         return "Password must contain at least one lowercase letter"
-    if not any(c.isdigit() for c in password):
+    if not has_digit:
         return "Password must contain at least one digit"
     return None
 
 
 # ── JWT Token Management ────────────────────────────────────────────────────
 
+# HS256 is the only algorithm this service issues, so tokens are signed and
+# verified directly with hmac + orjson. PyJWT remains the path for any other
+# configured algorithm.
+JWT_SECRET_BYTES = JWT_SECRET.encode("utf-8")
+_USE_FAST_HS256 = JWT_ALGORITHM == "HS256"
+_HS256_HEADER_B64 = base64.urlsafe_b64encode(
+    orjson.dumps({"alg": "HS256", "typ": "JWT"})
+).rstrip(b"=")
+
+
+def _b64url_encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+def _b64url_decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def _fast_encode_hs256(payload: dict) -> str:
+    signing_input = _HS256_HEADER_B64 + b"." + _b64url_encode(orjson.dumps(payload))
+    signature = hmac.digest(JWT_SECRET_BYTES, signing_input, "sha256")
+    return (signing_input + b"." + _b64url_encode(signature)).decode("ascii")
+
+
+def _fast_decode_hs256(token: str) -> dict:
+    """
+    Verify an HS256 JWT and return its payload.
+    Raises the same PyJWT exception types as jwt.decode.
+    """
+    try:
+        # Non-ASCII input raises UnicodeEncodeError (a ValueError) here, not later
+        header_b64, payload_b64, sig_b64 = token.encode("ascii").split(b".")
+        header = orjson.loads(_b64url_decode(header_b64))
+        signature = _b64url_decode(sig_b64)
+    except (ValueError, binascii.Error, orjson.JSONDecodeError) as e:
+        raise jwt.DecodeError("Invalid token encoding") from e
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+
+    expected = hmac.digest(JWT_SECRET_BYTES, header_b64 + b"." + payload_b64, "sha256")
+    if not hmac.compare_digest(expected, signature):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+
+    try:
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, binascii.Error) as e:
+        raise jwt.DecodeError("Invalid payload encoding") from e
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload string: must be a json object")
+
+    exp = payload.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
+
+
 def create_access_token(
     user_id: str,
     tenant_id: str,
@@ -54,10 +161,14 @@ def create_access_token(
         "sub": str(user_id),
         "tenant_id": str(tenant_id) if tenant_id else "",
         "role": role,
-        "jti": str(uuid.uuid4()),
+        "jti": secrets.token_urlsafe(16),
         "iat": now,
         "exp": exp,
     }
+    if _USE_FAST_HS256:
+        payload["iat"] = int(now.timestamp())
+        payload["exp"] = int(exp.timestamp())
+        return _fast_encode_hs256(payload)
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
@@ -66,6 +177,8 @@ def decode_token(token: str) -> dict:
     Decode and validate a JWT token.
     Raises jwt.ExpiredSignatureError or jwt.InvalidTokenError on failure.
     """
+    if _USE_FAST_HS256:
+        return _fast_decode_hs256(token)
     return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
 
 
@@ -1,19 +1,30 @@
 """
 FastAPI dependency injection — authentication, authorization, tenant scoping.
 """
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 from uuid import UUID
 
+import redis
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 import jwt as pyjwt
 
+from config import REDIS_URL
 from core.auth import decode_token
-from core.db import SessionLocal
+from core.db import SessionLocal, ReadOnlySessionLocal
+from models.models import TokenBlacklist
 
+logger = logging.getLogger(__name__)
 
 # ── Security Scheme ──────────────────────────────────────────────────────────
 
@@ -31,14 +42,164 @@ class UserContext:
     jti: str
 
 
+# ── Validated Token Cache ────────────────────────────────────────────────────
+# Bearer tokens are reused for their whole lifetime, so a decoded + blacklist-
+# checked UserContext is cached per process until the token's own `exp`.
+# Keys are blake2b digests so raw tokens are never held in memory.
+
+_TOKEN_CACHE_MAXSIZE = 10_000
+_token_cache: "OrderedDict[bytes, tuple[float, UserContext]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+# ── Token Blacklist Snapshot ─────────────────────────────────────────────────
+# Revoked jtis are few and rarely written, so each process keeps a snapshot
+# of the unexpired blacklist, reloaded every _BLACKLIST_REFRESH_SECONDS.
+# Logouts are also pushed to Redis: a sorted set of revoked jtis (scored by
+# token expiry) plus a version counter. Every request compares the counter
+# (one GET) and pulls the set when it moved, so a logout on any worker is
+# enforced on all of them immediately. If Redis is unreachable the snapshot
+# is reloaded from the DB on every request instead.
+# Logouts handled by this process are applied immediately and kept across
+# reloads until their DB row is certain to be visible.
+
+_BLACKLIST_REFRESH_SECONDS = 30
+_REVOKED_JTIS_KEY = "auth:revoked_jtis"
+_REVOKED_VERSION_KEY = "auth:revoked_jtis:version"
+_redis = redis.from_url(REDIS_URL, decode_responses=True)
+
+_blacklisted_jtis: frozenset[str] = frozenset()
+_blacklist_loaded_at = float("-inf")
+_db_revocations: frozenset[str] = frozenset()
+_remote_revocations: frozenset[str] = frozenset()
+_remote_version: Optional[str] = None
+_local_revocations: dict[str, float] = {}  # jti -> monotonic time revoked
+_blacklist_lock = threading.Lock()
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def _get_cached_user(key: bytes) -> Optional[UserContext]:
+    """Return the cached UserContext for a token digest, or None on miss/expiry."""
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is None:
+            return None
+        expiry, ctx = entry
+        if expiry <= time.time() or ctx.jti in _blacklisted_jtis:
+            del _token_cache[key]
+            return None
+        _token_cache.move_to_end(key)
+        return ctx
+
+
+def _cache_user(key: bytes, ctx: UserContext, expiry: float) -> None:
+    with _token_cache_lock:
+        _token_cache[key] = (expiry, ctx)
+        _token_cache.move_to_end(key)
+        while len(_token_cache) > _TOKEN_CACHE_MAXSIZE:
+            _token_cache.popitem(last=False)
+
+
+def _refresh_blacklist(db: Session) -> None:
+    """
+    Bring the blacklist snapshot up to date: pull Redis revocations when the
+    version counter moved, and reload from the DB when the snapshot is older
+    than the refresh interval (or on every call while Redis is unreachable).
+    """
+    global _blacklisted_jtis, _blacklist_loaded_at, _db_revocations
+    global _remote_revocations, _remote_version
+    try:
+        version = _redis.get(_REVOKED_VERSION_KEY)
+        redis_ok = True
+    except redis.RedisError as e:
+        logger.warning(f"Revocation feed unavailable, reloading blacklist from DB: {e}")
+        version, redis_ok = None, False
+
+    if (
+        redis_ok and version == _remote_version
+        and time.monotonic() - _blacklist_loaded_at < _BLACKLIST_REFRESH_SECONDS
+    ):
+        return
+    with _blacklist_lock:
+        now = time.monotonic()
+        if redis_ok and version != _remote_version:
+            try:
+                remote = _redis.zrangebyscore(_REVOKED_JTIS_KEY, time.time(), "+inf")
+            except redis.RedisError as e:
+                logger.warning(f"Revocation feed unavailable, reloading blacklist from DB: {e}")
+                redis_ok = False
+            else:
+                _remote_revocations = frozenset(remote)
+                _remote_version = version
+
+        if not redis_ok or now - _blacklist_loaded_at >= _BLACKLIST_REFRESH_SECONDS:
+            rows = (
+                db.query(TokenBlacklist.jti)
+                .filter(TokenBlacklist.expires_at > datetime.now(timezone.utc))
+                .all()
+            )
+            for jti, revoked_at in list(_local_revocations.items()):
+                if now - revoked_at > 2 * _BLACKLIST_REFRESH_SECONDS:
+                    del _local_revocations[jti]
+            _db_revocations = frozenset(jti for (jti,) in rows)
+            _blacklist_loaded_at = now
+
+        _blacklisted_jtis = _db_revocations.union(_remote_revocations, _local_revocations)
+
+
+def revoke_cached_token(jti: str, expires_at: datetime) -> None:
+    """
+    Mark a jti as revoked so cached contexts for it are rejected immediately,
+    in this process and (via Redis) on every other worker.
+    """
+    global _blacklisted_jtis
+    if not jti:
+        return
+    with _blacklist_lock:
+        _local_revocations[jti] = time.monotonic()
+        _blacklisted_jtis = _blacklisted_jtis | {jti}
+
+    try:
+        pipe = _redis.pipeline()
+        pipe.zadd(_REVOKED_JTIS_KEY, {jti: expires_at.timestamp()})
+        pipe.zremrangebyscore(_REVOKED_JTIS_KEY, "-inf", time.time())
+        pipe.incr(_REVOKED_VERSION_KEY)
+        pipe.execute()
+    except redis.RedisError as e:
+        # Other workers still pick the revocation up from the DB on reload
+        logger.error(f"Failed to publish token revocation: {e}")
+
+
+@lru_cache(maxsize=16384)
+def _parse_uuid(value: str) -> UUID:
+    """Memoised UUID parse — the same user/tenant ids recur on every token."""
+    return UUID(value)
+
+
 # ── Database Session Dependency ──────────────────────────────────────────────
 
+def _session_has_writes(session: Session) -> bool:
+    return bool(
+        session.new or session.dirty or session.deleted
+        or session.info.get("has_writes")
+    )
+
+
 def get_db_session():
-    """Yield a database session, auto-closing after request."""
+    """
+    Yield a database session, auto-closing after request.
+    Commits only if the request actually wrote something; pure reads just
+    roll back the implicit transaction instead of paying for a COMMIT.
+    """
     session = SessionLocal()
     try:
         yield session
-        session.commit()
+        if session.in_transaction() and _session_has_writes(session):
+            session.commit()
+        else:
+            session.rollback()
     except Exception:
         session.rollback()
         raise
@@ -46,6 +207,15 @@ def get_db_session():
         session.close()
 
 
+def get_read_db_session():
+    """Yield an AUTOCOMMIT session for read-only endpoints (no transaction)."""
+    session = ReadOnlySessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
 # ── Auth Dependencies ────────────────────────────────────────────────────────
 
 def get_current_user(
@@ -54,9 +224,16 @@ def get_current_user(
 ) -> UserContext:
     """
     Decode JWT from Authorization header and return UserContext.
-    Also checks token is not blacklisted.
+    Also checks token is not blacklisted (against the in-process snapshot).
+    Validated tokens are served from an in-process cache until they expire.
     """
     token = credentials.credentials
+    _refresh_blacklist(db)
+    cache_key = _token_cache_key(token)
+    cached = _get_cached_user(cache_key)
+    if cached is not None:
+        return cached
+
     try:
         payload = decode_token(token)
     except pyjwt.ExpiredSignatureError:
@@ -71,9 +248,8 @@ def get_current_user(
         )
 
     # Check blacklist
-    from models.models import TokenBlacklist
     jti = payload.get("jti")
-    if jti and db.query(TokenBlacklist).filter(TokenBlacklist.jti == jti).first():
+    if jti and jti in _blacklisted_jtis:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
@@ -81,14 +257,19 @@ def get_current_user(
 
     # Parse tenant_id — may be empty for global patients
     raw_tenant = payload.get("tenant_id", "")
-    tenant_id = UUID(raw_tenant) if raw_tenant else None
+    tenant_id = _parse_uuid(raw_tenant) if raw_tenant else None
 
-    return UserContext(
-        user_id=UUID(payload["sub"]),
+    ctx = UserContext(
+        user_id=_parse_uuid(payload["sub"]),
         tenant_id=tenant_id,
         role=payload["role"],
         jti=jti or "",
     )
+    # Tokens without exp are still valid but never cached (no safe expiry)
+    exp = payload.get("exp")
+    if exp is not None:
+        _cache_user(cache_key, ctx, float(exp))
+    return ctx
 
 
 def require_role(*allowed_roles: str):
@@ -4,15 +4,72 @@ Emergency Handler — Overrides normal routing for red-flag patients.
 Forces immediate General Dentist triage, ignores preferences.
 All queries are tenant-scoped.
 """
-from datetime import datetime, timedelta, time as dt_time
+from datetime import datetime
 from uuid import UUID
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from models.models import (
-    Doctor, DoctorSpecialization, Specialization, Room,
-    AvailabilityTemplate, Appointment, CalendarSlot,
+from config import DAY_START_HOUR, SLOT_MINUTES, SLOTS_PER_DAY
+
+
+# The whole search runs in Postgres: (GD doctor x template x day x block)
+# candidates are generated with generate_series, past/out-of-template blocks
+# are masked, booked doctor blocks are excluded via NOT EXISTS, and a free
+# active room at the template's clinic is picked with a LATERAL subquery.
+# Python weekday() is ISODOW - 1. Block bounds mirror the template → mask
+# conversion used by the scheduling engine (start/end hour granularity).
+_EMERGENCY_SLOT_SQL = text("""
+WITH gd_doctors AS (
+    SELECT d.doctor_id, d.name
+    FROM doctors d
+    JOIN doctor_specializations ds ON ds.doctor_id = d.doctor_id
+    WHERE d.active = true
+      AND (CAST(:tenant_id AS uuid) IS NULL OR d.tenant_id = CAST(:tenant_id AS uuid))
+      AND ds.spec_id = (
+          SELECT s.spec_id FROM specializations s
+          WHERE s.name = 'General Dentist'
+            AND (CAST(:tenant_id AS uuid) IS NULL OR s.tenant_id = CAST(:tenant_id AS uuid))
+          LIMIT 1
+      )
+),
+days AS (
+    SELECT CAST(:today AS date) + n AS day
+    FROM generate_series(0, :lookahead_days) AS n
+),
+candidates AS (
+    SELECT g.doctor_id, g.name AS doctor_name, t.clinic_id, days.day, b.block
+    FROM gd_doctors g
+    JOIN availability_templates t
+      ON t.resource_id = g.doctor_id AND t.resource_type = 'DOCTOR'
+    JOIN days
+      ON t.day_of_week = EXTRACT(ISODOW FROM days.day) - 1
+    JOIN generate_series(0, :slots_per_day - 1) AS b(block)
+      ON b.block >= GREATEST(0, (EXTRACT(HOUR FROM t.start_time) - :day_start_hour) * :blocks_per_hour)
+     AND b.block < LEAST(:slots_per_day, (EXTRACT(HOUR FROM t.end_time) - :day_start_hour) * :blocks_per_hour)
+    WHERE days.day > CAST(:today AS date) OR b.block > :current_block
 )
-from config import DAY_START_HOUR, DAY_END_HOUR, SLOT_MINUTES, SLOTS_PER_DAY
-import math
+SELECT c.day, c.block, c.doctor_id, c.doctor_name, c.clinic_id, r.room_id, r.room_name
+FROM candidates c
+CROSS JOIN LATERAL (
+    SELECT rm.room_id, rm.name AS room_name
+    FROM rooms rm
+    WHERE rm.clinic_id = c.clinic_id
+      AND rm.status = 'active'
+      AND NOT EXISTS (
+          SELECT 1 FROM calendar_slots cs
+          WHERE cs.entity_type = 'room' AND cs.entity_id = rm.room_id
+            AND cs.date = c.day AND cs.time_block = c.block AND cs.booked = true
+      )
+    ORDER BY rm.name
+    LIMIT 1
+) r
+WHERE NOT EXISTS (
+    SELECT 1 FROM calendar_slots cs
+    WHERE cs.entity_type = 'doctor' AND cs.entity_id = c.doctor_id
+      AND cs.date = c.day AND cs.time_block = c.block AND cs.booked = true
+)
+ORDER BY c.day, c.block, c.doctor_name
+LIMIT 1
+""")
 
 
 def handle_emergency(
@@ -25,109 +82,40 @@ def handle_emergency(
     at the tenant's clinics. Overrides preference windows and combo logic.
     Scoped to tenant_id.
     """
-    # Get General Dentist spec — TENANT SCOPED
-    gd_query = db.query(Specialization).filter(Specialization.name == "General Dentist")
-    if tenant_id:
-        gd_query = gd_query.filter(Specialization.tenant_id == tenant_id)
-    gd_spec = gd_query.first()
-    if not gd_spec:
-        return None
-
-    # Get all active GD doctors — TENANT SCOPED if provided
-    gd_doc_query = (
-        db.query(Doctor)
-        .join(DoctorSpecialization)
-        .filter(DoctorSpecialization.spec_id == gd_spec.spec_id)
-        .filter(Doctor.active == True)
-    )
-    if tenant_id:
-        gd_doc_query = gd_doc_query.filter(Doctor.tenant_id == tenant_id)
-    gd_doctors = gd_doc_query.all()
-    if not gd_doctors:
-        return None
-
     now = datetime.utcnow()
-    today = now.date()
-
-    # Search today + next 3 days for absolute earliest slot
-    for day_offset in range(4):
-        check_date = today + timedelta(days=day_offset)
-        dow = check_date.weekday()
+    current_block = (now.hour - DAY_START_HOUR) * (60 // SLOT_MINUTES) + now.minute // SLOT_MINUTES
 
-        for doc in gd_doctors:
-            # Check if doctor works this day
-            templates = (
-                db.query(AvailabilityTemplate)
-                .filter(
-                    AvailabilityTemplate.resource_id == doc.doctor_id,
-                    AvailabilityTemplate.resource_type == "DOCTOR",
-                    AvailabilityTemplate.day_of_week == dow,
-                )
-                .all()
-            )
-            if not templates:
-                continue
-
-            for tmpl in templates:
-                clinic_id = tmpl.clinic_id
-
-                # Get a room at this clinic (any operatory) — same tenant
-                room_query = (
-                    db.query(Room)
-                    .filter(Room.clinic_id == clinic_id, Room.status == "active")
-                )
-                room = room_query.first()
-                if not room:
-                    continue
-
-                # Build availability mask for this doctor on this day
-                start_block = max(0, (tmpl.start_time.hour - DAY_START_HOUR) * (60 // SLOT_MINUTES))
-                end_block = min(SLOTS_PER_DAY, (tmpl.end_time.hour - DAY_START_HOUR) * (60 // SLOT_MINUTES))
-
-                # If today, skip past blocks
-                if check_date == today:
-                    current_block = max(0, (now.hour - DAY_START_HOUR) * (60 // SLOT_MINUTES) + now.minute // SLOT_MINUTES)
-                    start_block = max(start_block, current_block + 1)
-
-                # Check each block for first free one
-                for block in range(start_block, end_block):
-                    # Check doctor not booked
-                    doc_booked = db.query(CalendarSlot).filter(
-                        CalendarSlot.entity_type == "doctor",
-                        CalendarSlot.entity_id == doc.doctor_id,
-                        CalendarSlot.date == check_date,
-                        CalendarSlot.time_block == block,
-                        CalendarSlot.booked == True,
-                    ).first()
-
-                    room_booked = db.query(CalendarSlot).filter(
-                        CalendarSlot.entity_type == "room",
-                        CalendarSlot.entity_id == room.room_id,
-                        CalendarSlot.date == check_date,
-                        CalendarSlot.time_block == block,
-                        CalendarSlot.booked == True,
-                    ).first()
-
-                    if not doc_booked and not room_booked:
-                        slot_hour = DAY_START_HOUR + (block * SLOT_MINUTES) // 60
-                        slot_min = (block * SLOT_MINUTES) % 60
-                        end_block = block + 1  # 15-min emergency slot
-                        end_hour = DAY_START_HOUR + (end_block * SLOT_MINUTES) // 60
-                        end_min = (end_block * SLOT_MINUTES) % 60
-                        return {
-                            "type": "EMERGENCY",
-                            "date": str(check_date),
-                            "time": f"{slot_hour:02d}:{slot_min:02d}",
-                            "end_time": f"{end_hour:02d}:{end_min:02d}",
-                            "time_block": block,
-                            "duration_minutes": 15,
-                            "doctor_id": str(doc.doctor_id),
-                            "doctor_name": doc.name,
-                            "room_id": str(room.room_id),
-                            "room_name": room.name,
-                            "clinic_id": str(clinic_id),
-                            "procedure": "Emergency Triage",
-                            "score": 1000,
-                        }
+    # Search today + next 3 days for absolute earliest slot — one round-trip
+    row = db.execute(_EMERGENCY_SLOT_SQL, {
+        "tenant_id": str(tenant_id) if tenant_id else None,
+        "today": now.date(),
+        "lookahead_days": 3,
+        "slots_per_day": SLOTS_PER_DAY,
+        "day_start_hour": DAY_START_HOUR,
+        "blocks_per_hour": 60 // SLOT_MINUTES,
+        "current_block": max(0, current_block),
+    }).first()
+    if row is None:
+        return None
 
-    return None
+    check_date, block, doctor_id, doctor_name, clinic_id, room_id, room_name = row
+    slot_hour = DAY_START_HOUR + (block * SLOT_MINUTES) // 60
+    slot_min = (block * SLOT_MINUTES) % 60
+    end_block = block + 1  # 15-min emergency slot
+    end_hour = DAY_START_HOUR + (end_block * SLOT_MINUTES) // 60
+    end_min = (end_block * SLOT_MINUTES) % 60
+    return {
+        "type": "EMERGENCY",
+        "date": str(check_date),
+        "time": f"{slot_hour:02d}:{slot_min:02d}",
+        "end_time": f"{end_hour:02d}:{end_min:02d}",
+        "time_block": block,
+        "duration_minutes": 15,
+        "doctor_id": str(doctor_id),
+        "doctor_name": doctor_name,
+        "room_id": str(room_id),
+        "room_name": room_name,
+        "clinic_id": str(clinic_id),
+        "procedure": "Emergency Triage",
+        "score": 1000,
+    }
@@ -5,22 +5,55 @@ Semantic clinical extraction with strict safety guardrails, multi-condition supp
 chat history context, and post-LLM safety validation.
 """
 import re
-import json
 import logging
-from dataclasses import dataclass, asdict, field
-from typing import Optional, List, Dict, Any
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Optional, List, Dict, Any, Callable
+import google.genai as genai
+import orjson
 from config import GEMINI_API_KEY, GEMINI_MODEL
+from core import intent_cache
+
+try:  # linear-time DFA engine for the LLM-output scanner; `re` if unavailable
+    import re2 as _safety_re
+except ImportError:
+    _safety_re = re
 
 logger = logging.getLogger(__name__)
 
 # ── Valid values ────────────────────────────────────────────────────────────
 VALID_URGENCIES = {"EMERGENCY", "HIGH", "MEDIUM", "LOW", None}
 
+# LLM may only assign these; EMERGENCY comes from deterministic checks
+_LLM_URGENCIES = frozenset({"HIGH", "MEDIUM", "LOW"})
+
+# (field, default) read from each LLM issue; urgency/reported_symptoms are
+# handled separately in ClinicalIssue.from_llm_dict
+_LLM_ISSUE_FIELDS = (
+    ("symptom_cluster", "Unknown symptoms"),
+    ("reasoning", ""),
+    # Feature Flags
+    ("has_pain", False),
+    ("severity", None),
+    ("duration_days", None),
+    ("thermal_sensitivity", False),
+    ("biting_pain", False),
+    ("swelling", False),
+    ("visible_swelling", False),
+    ("airway_compromise", False),
+    ("trauma", False),
+    ("bleeding", False),
+    ("impacted_wisdom", False),
+    # Metadata
+    ("location", None),
+    ("suspected_category", None),  # Optional/Deprecated
+)
+
 # ═══════════════════════════════════════════════════════════════════════════
 #  Data Classes
 # ═══════════════════════════════════════════════════════════════════════════
 
-@dataclass
+@dataclass(slots=True)
 class ClinicalIssue:
     symptom_cluster: str          # e.g., "upper right tooth severe night pain"
     urgency: str                  # EMERGENCY | HIGH | MEDIUM | LOW
@@ -53,9 +86,45 @@ class ClinicalIssue:
     field_answers: Dict[str, Any] = field(default_factory=dict)
 
     def to_dict(self):
-        return asdict(self)
+        # Hand-built instead of asdict(): no recursive deepcopy per response
+        return {
+            "symptom_cluster": self.symptom_cluster,
+            "urgency": self.urgency,
+            "reasoning": self.reasoning,
+            "has_pain": self.has_pain,
+            "severity": self.severity,
+            "duration_days": self.duration_days,
+            "thermal_sensitivity": self.thermal_sensitivity,
+            "biting_pain": self.biting_pain,
+            "swelling": self.swelling,
+            "visible_swelling": self.visible_swelling,
+            "airway_compromise": self.airway_compromise,
+            "trauma": self.trauma,
+            "bleeding": self.bleeding,
+            "impacted_wisdom": self.impacted_wisdom,
+            "requires_sedation": self.requires_sedation,
+            "location": self.location,
+            "reported_symptoms": list(self.reported_symptoms),
+            "suspected_category": self.suspected_category,
+            "clinical_profile": dict(self.clinical_profile),
+            "missing_clinical_elements": list(self.missing_clinical_elements),
+            "missing_fields": [dict(f) for f in self.missing_fields],
+            "field_answers": dict(self.field_answers),
+        }
+
+    @classmethod
+    def from_llm_dict(cls, d: dict) -> "ClinicalIssue":
+        """Build an issue from one LLM `issues[]` entry (urgency clamped to HIGH/MEDIUM/LOW)."""
+        urgency = d.get("urgency", "MEDIUM")
+        if urgency not in _LLM_URGENCIES:
+            urgency = "MEDIUM"
+        return cls(
+            urgency=urgency,
+            reported_symptoms=d.get("reported_symptoms", []),
+            **{name: d.get(name, default) for name, default in _LLM_ISSUE_FIELDS},
+        )
 
-@dataclass
+@dataclass(slots=True)
 class IntentResult:
     issues: List[ClinicalIssue] = field(default_factory=list)
     overall_urgency: Optional[str] = None
@@ -67,29 +136,42 @@ class IntentResult:
     completion_status: str = "INCOMPLETE"  # COMPLETE | INCOMPLETE
 
     def to_dict(self):
-        return asdict(self)
+        return {
+            "issues": [i.to_dict() for i in self.issues],
+            "overall_urgency": self.overall_urgency,
+            "requires_clarification": self.requires_clarification,
+            "clarification_questions": list(self.clarification_questions),
+            "safety_flag": self.safety_flag,
+            "action_type": self.action_type,
+            "patient_sentiment": self.patient_sentiment,
+            "completion_status": self.completion_status,
+        }
+
+
+# Keys structured_data["issues"] entries may carry back into ClinicalIssue
+_ISSUE_FIELD_NAMES = frozenset(f.name for f in fields(ClinicalIssue))
 
 
 # ═══════════════════════════════════════════════════════════════════════════
 #  Deterministic Pattern Matching (Tier 0–1)
 # ═══════════════════════════════════════════════════════════════════════════
 
-_GREETING_PATTERNS = [
+_GREETING_SOURCES = (
     r"^(hi|hii+|hey|hello|hola|yo|sup|hiya|howdy|greetings|good\s*(morning|afternoon|evening|day|night))[\s!?.]*$",
     r"^(what'?s?\s*up|how\s*are\s*you|how'?s?\s*it\s*going)[\s!?.]*$",
     r"^(thanks|thank\s*you|ty|thx|cheers)[\s!?.]*$",
     r"^(bye|goodbye|see\s*you|later|cya|take\s*care)[\s!?.]*$",
     r"^(ok|okay|sure|alright|fine|cool|great|nice|awesome|got\s*it|understood)[\s!?.]*$",
     r"^(yes|no|yep|nope|yeah|nah|yup)[\s!?.]*$",
-]
+)
 
-_SMALL_TALK_PATTERNS = [
+_SMALL_TALK_SOURCES = (
     r"^(who\s*are\s*you|what\s*can\s*you\s*do|what\s*is\s*this|help)[\s!?.]*$",
     r"^(tell\s*me\s*(about|more)|what\s*services)[\s!?.]*$",
     r"^(can\s*you\s*help|i\s*need\s*help)[\s!?.]*$",
-]
+)
 
-_RED_FLAGS = [
+_RED_FLAG_SOURCES = (
     r"(?:^|[^\w])(?:can'?t|cannot|unable to)\s+breathe",
     r"(?:^|[^\w])(?:difficulty|trouble)\s+breathing",
     r"uncontrollable?\s+bleed",
@@ -105,7 +187,75 @@ _RED_FLAGS = [
     r"(tooth|teeth)\s*(knocked?\s*(out|off)|avulsed)",
     r"heavy\s+bleeding.{0,20}(tooth|gum|mouth)",
     # Removed "pain 9/10" regex as requested - defer to LLM high urgency
-]
+)
+
+# Tier 1 + Tier 2 in one alternation = one engine pass per message.
+# m.lastgroup says which fired: "rfN" (red flag N), "gr" (greeting), "st" (small talk).
+# Red flags come first so they win at any shared position; greeting/small-talk
+# alternatives are ^...$ anchored, so they only match a whole (short) message.
+_TIER_COMBINED_RE = re.compile("|".join(
+    [f"(?P<rf{i}>{p})" for i, p in enumerate(_RED_FLAG_SOURCES)]
+    + ["(?P<gr>" + "|".join(f"(?:{p})" for p in _GREETING_SOURCES) + ")"]
+    + ["(?P<st>" + "|".join(f"(?:{p})" for p in _SMALL_TALK_SOURCES) + ")"]
+))
+
+# Every red-flag match contains at least one of these substrings; messages
+# with none of them (the common case) skip the regex engine entirely.
+# Keep in sync with _RED_FLAG_SOURCES.
+_RED_FLAG_KEYWORDS = (
+    "breath", "bleed", "swell", "trauma", "fracture", "broken", "anaphyla",
+    "allergic", "chest", "consciousness", "swallow", "knock", "avulsed",
+)
+
+# Single-word greetings/small talk (the bulk of Tier-2 traffic) resolve with
+# one hash probe; multi-word forms fall through to _TIER_COMBINED_RE.
+# Keep in sync with the sources above.
+_GREETING_WORDS = frozenset({
+    "hi", "hii", "hiii", "hey", "hello", "hola", "yo", "sup", "hiya", "howdy", "greetings",
+    "thanks", "ty", "thx", "cheers",
+    "bye", "goodbye", "later", "cya",
+    "ok", "okay", "sure", "alright", "fine", "cool", "great", "nice", "awesome", "understood",
+    "yes", "no", "yep", "nope", "yeah", "nah", "yup",
+})
+_SMALL_TALK_WORDS = frozenset({"help"})
+_TRAILING_PUNCT = " \t\n\r\f\v!?."
+
+# Leading letters of every greeting/small-talk alternation head (keep in sync
+# with the patterns above); other messages can only hit a red flag.
+_TIER2_FIRST_CHARS = frozenset("hysgwtcblofanuie")
+
+# Word stems that signal a dental/clinical concern. A first message with none
+# of them ("thanks doctor", "please schedule me") has nothing for the LLM to
+# extract, so it is asked for the dental concern without the Gemini round-trip.
+# Err on the side of listing a stem: a miss here keeps a message from the LLM,
+# which is what sets airway_compromise / trauma and escalates.
+_CLINICAL_SIGNAL_RE = re.compile(r"\b(?:" + "|".join((
+    # anatomy
+    "tooth", "teeth", "molar", "incisor", "canine", "wisdom", "gum", "jaw",
+    "mouth", "lip", "tongue", "cheek", "palate", "face", "nerve", "enamel",
+    "throat", "neck", "chin", "eye",
+    # symptoms
+    "pain", "ach", "hurt", "sore", "throb", "sting", "sharp", "tender",
+    "sensitiv", "cold", "hot", "sweet", "bit", "chew", "swell", "swollen",
+    "bleed", "blood", "pus", "abscess", "infect", "fever", "numb", "tingl",
+    "click", "lock", "grind", "clench", "tmj", "breath", "smell", "taste",
+    "ulcer", "lump", "bump", "discomfort", "irritat", "headache", "ear", "sinus",
+    "swallow", "rash", "allerg", "vomit", "dizz", "faint",
+    # damage / trauma
+    "cavit", "decay", "caries", "chip", "crack", "broke", "fractur", "loose",
+    "fell", "fall", "lost", "knock", "trauma", "injur", "accident", "stain",
+    "hit", "punch",
+    # treatments / visits
+    "filling", "crown", "bridge", "implant", "denture", "brace", "aligner",
+    "retainer", "veneer", "root", "canal", "extract", "clean", "check",
+    "exam", "x-?ray", "whiten", "sedat", "dental", "dentist", "oral",
+    "ortho", "periodon", "endodon", "surg", "hygien", "emergenc", "urgent",
+    "rct", "consult", "treat", "procedur", "pulp", "scal", "gingiv", "plaque",
+    "tartar", "floss", "brush", "invisalign", "bleach",
+    # anxiety (sedation routing)
+    "anxi", "scare", "nervous", "fear", "afraid", "phobi",
+)) + ")")
+_SMALL_TALK_MAX_WORDS = 12
 
 _CLARIFICATION_DEFAULTS = [
     "Could you describe your symptoms in more detail?",
@@ -116,6 +266,19 @@ _CLARIFICATION_DEFAULTS = [
 
 _STRUCTURED_META_KEYS = {"issues", "answers", "field_submission", "pendingStructuredData"}
 
+_DIGITS_RE = re.compile(r"\d+")
+
+# Duration UI options / phrases -> representative day count. Bare numbers are
+# a separate fallback so "2 months" still reads as months, not 2 days.
+# Group order is priority order: when several phrases appear, the earliest
+# group wins regardless of where it sits in the text ("4-7 days, worse today"
+# is 1). No phrase can hide inside an overlapping match of a lower-priority one.
+_DURATION_RE = re.compile(
+    r"(?P<lt24>less than 24|today)|(?P<w13>1-3)|(?P<w47>4-7)|(?P<w12w>1-2 week)"
+    r"|(?P<mo>more than 2 week|months)|(?P<sub>seconds|minutes|hours)"
+)
+_DURATION_DAYS = {"lt24": 1, "w13": 2, "w47": 5, "w12w": 10, "mo": 21, "sub": 1}
+
 
 def _parse_duration_days(value: Any) -> Optional[int]:
     if value is None:
@@ -125,24 +288,15 @@ def _parse_duration_days(value: Any) -> Optional[int]:
     text = str(value).strip().lower()
     if not text:
         return None
-    if "less than 24" in text or "today" in text:
-        return 1
-    if "1-3" in text:
-        return 2
-    if "4-7" in text:
-        return 5
-    if "1-2 week" in text:
-        return 10
-    if "more than 2 week" in text or "months" in text:
-        return 21
-    if "seconds" in text:
-        return 1
-    if "minutes" in text:
-        return 1
-    if "hours" in text:
-        return 1
-    nums = re.findall(r"\d+", text)
-    return int(nums[0]) if nums else None
+    m = min(
+        _DURATION_RE.finditer(text),
+        key=lambda m: _DURATION_RE.groupindex[m.lastgroup],
+        default=None,
+    )
+    if m:
+        return _DURATION_DAYS[m.lastgroup]
+    num = _DIGITS_RE.search(text)
+    return int(num.group()) if num else None
 
 
 def _normalize_structured_answers(structured_data: Optional[dict]) -> Dict[str, Any]:
@@ -167,6 +321,92 @@ def _normalize_structured_answers(structured_data: Optional[dict]) -> Dict[str,
     return answers
 
 
+# ── Structured answer handlers: (issue, raw value, text, lowercased text) ──
+
+_THERMAL_TOKENS = ("hot", "cold", "thermal")
+_BITING_TOKENS = ("chew", "biting", "pressure")
+_VISIBLE_SWELLING_TOKENS = ("face", "cheek", "jaw", "neck", "floor")
+_AIRWAY_TOKENS = ("difficulty breathing", "unable", "can’t breathe", "can't breathe")
+_HEMORRHAGE_TOKENS = ("uncontrolled", "heavy", "fills mouth")
+
+
+def _answer_symptom(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    if value_text:
+        issue.reported_symptoms.append(value_text)
+
+
+def _answer_location(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    if value_text:
+        issue.location = value_text
+
+
+def _answer_severity(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    try:
+        issue.severity = int(value) if value is not None else issue.severity
+        issue.has_pain = True
+    except (TypeError, ValueError):
+        pass
+
+
+def _answer_duration(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    parsed_days = _parse_duration_days(value)
+    if parsed_days is not None:
+        issue.duration_days = parsed_days
+    _answer_symptom(issue, value, value_text, lowered)
+
+
+def _answer_thermal_duration(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    if value_text:
+        issue.thermal_sensitivity = True
+        issue.reported_symptoms.append(value_text)
+
+
+def _answer_stimulus(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    issue.has_pain = True
+    if any(token in lowered for token in _THERMAL_TOKENS):
+        issue.thermal_sensitivity = True
+    if any(token in lowered for token in _BITING_TOKENS):
+        issue.biting_pain = True
+    _answer_symptom(issue, value, value_text, lowered)
+
+
+def _answer_swelling_location(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    issue.swelling = True
+    if any(token in lowered for token in _VISIBLE_SWELLING_TOKENS):
+        issue.visible_swelling = True
+    _answer_symptom(issue, value, value_text, lowered)
+
+
+def _answer_airway_status(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    if any(token in lowered for token in _AIRWAY_TOKENS):
+        issue.airway_compromise = True
+    _answer_symptom(issue, value, value_text, lowered)
+
+
+def _answer_hemorrhage_status(issue: "ClinicalIssue", value: Any, value_text: str, lowered: str) -> None:
+    if any(token in lowered for token in _HEMORRHAGE_TOKENS):
+        issue.bleeding = True
+    _answer_symptom(issue, value, value_text, lowered)
+
+
+# Keys not listed here (previous_intervention, trismus_status, last_visit, ...)
+# are recorded as reported symptoms.
+_ANSWER_HANDLERS: Dict[str, Callable[["ClinicalIssue", Any, str, str], None]] = {
+    "location": _answer_location,
+    "pain_location": _answer_location,
+    "pain_severity": _answer_severity,
+    "severity": _answer_severity,
+    "duration": _answer_duration,
+    "duration_days": _answer_duration,
+    "symptom_duration": _answer_duration,
+    "thermal_duration": _answer_thermal_duration,
+    "stimulus": _answer_stimulus,
+    "swelling_location": _answer_swelling_location,
+    "airway_status": _answer_airway_status,
+    "hemorrhage_status": _answer_hemorrhage_status,
+}
+
+
 def _apply_structured_answers_to_issue(issue: "ClinicalIssue", answers: Dict[str, Any]) -> None:
     if not answers:
         return
@@ -183,63 +423,16 @@ def _apply_structured_answers_to_issue(issue: "ClinicalIssue", answers: Dict[str
         if value is not None and key:
             issue.field_answers[key] = value
 
-        if key in {"location", "pain_location"} and value_text:
-            issue.location = value_text
-        elif key in {"pain_severity", "severity"}:
-            try:
-                issue.severity = int(value) if value is not None else issue.severity
-                issue.has_pain = True
-            except (TypeError, ValueError):
-                pass
-        elif key in {"duration", "duration_days", "symptom_duration"}:
-            parsed_days = _parse_duration_days(value)
-            if parsed_days is not None:
-                issue.duration_days = parsed_days
-            if value_text:
-                issue.reported_symptoms.append(value_text)
-        elif key == "thermal_duration" and value_text:
-            issue.thermal_sensitivity = True
-            issue.reported_symptoms.append(value_text)
-        elif key == "stimulus":
-            issue.has_pain = True
-            lowered = value_text.lower()
-            if any(token in lowered for token in ["hot", "cold", "thermal"]):
-                issue.thermal_sensitivity = True
-            if any(token in lowered for token in ["chew", "biting", "pressure"]):
-                issue.biting_pain = True
-            if value_text:
-                issue.reported_symptoms.append(value_text)
-        elif key == "swelling_location":
-            lowered = value_text.lower()
-            issue.swelling = True
-            if any(token in lowered for token in ["face", "cheek", "jaw", "neck", "floor"]):
-                issue.visible_swelling = True
-            if value_text:
-                issue.reported_symptoms.append(value_text)
-        elif key == "trismus_status" and value_text:
-            issue.reported_symptoms.append(value_text)
-        elif key == "airway_status":
-            lowered = value_text.lower()
-            if any(token in lowered for token in ["difficulty breathing", "unable", "can’t breathe", "can't breathe"]):
-                issue.airway_compromise = True
-            if value_text:
-                issue.reported_symptoms.append(value_text)
-        elif key == "hemorrhage_status":
-            lowered = value_text.lower()
-            if any(token in lowered for token in ["uncontrolled", "heavy", "fills mouth"]):
-                issue.bleeding = True
-            if value_text:
-                issue.reported_symptoms.append(value_text)
-        elif key in {"previous_intervention", "analgesic_status", "chronobiology", "post_op_status", "systemic_risk", "imaging_availability", "nature_of_problem", "last_visit"} and value_text:
-            issue.reported_symptoms.append(value_text)
-        elif value_text:
-            issue.reported_symptoms.append(value_text)
-
-    # Deduplicate and clean
+        handler = _ANSWER_HANDLERS.get(key, _answer_symptom)
+        handler(issue, value, value_text, value_text.lower())
+
+    # Deduplicate and clean (set for membership, list keeps order)
+    seen: set[str] = set()
     deduped: List[str] = []
     for symptom in issue.reported_symptoms:
         s = (symptom or "").strip()
-        if s and s not in deduped:
+        if s and s not in seen:
+            seen.add(s)
             deduped.append(s)
     issue.reported_symptoms = deduped
 
@@ -248,16 +441,26 @@ def _apply_structured_answers_to_issue(issue: "ClinicalIssue", answers: Dict[str
 #  Post-LLM Safety Validation
 # ═══════════════════════════════════════════════════════════════════════════
 
-_FORBIDDEN_PATTERNS = [
+# Pure literals are checked with substring search before the regex pass
+_FORBIDDEN_LITERALS = ("prescribe", "prescription")
+
+_FORBIDDEN_SOURCES = (
     r"you\s+have\s+(pulpitis|periodontitis|abscess|gingivitis|caries|cavity|infection)",
     r"diagnosis\s+is",
     r"diagnosed\s+with",
     r"you\s+(need|require|should\s+get)\s+(a\s+)?(root\s+canal|extraction|filling|crown|implant|bridge)",
     r"take\s+(amoxicillin|ibuprofen|antibiotics|painkillers|acetaminophen|tylenol|advil)",
-    r"prescribe",
-    r"prescription",
     r"i\s+recommend\s+(taking|using)",
-]
+)
+
+# No lookarounds/backrefs here, so RE2 can take it (red flags use lookbehind and stay on `re`)
+_FORBIDDEN_RE = _safety_re.compile("|".join(f"(?P<fb{i}>{p})" for i, p in enumerate(_FORBIDDEN_SOURCES)))
+
+# Substring prefilter for _FORBIDDEN_SOURCES (keep in sync)
+_FORBIDDEN_KEYWORDS = ("you", "diagnos", "take", "recommend")
+
+# Shortest string any forbidden literal/pattern can match ("prescribe")
+_FORBIDDEN_MIN_LEN = 9
 
 
 def _validate_safety(raw_text: str) -> bool:
@@ -265,11 +468,20 @@ def _validate_safety(raw_text: str) -> bool:
     Post-LLM safety scanner. Returns True if the output is SAFE.
     Returns False if forbidden diagnosis/prescription patterns are detected.
     """
+    if len(raw_text) < _FORBIDDEN_MIN_LEN:  # e.g. the empty reasoning strings of Tier 3.7
+        return True
     lower = raw_text.lower()
-    for pattern in _FORBIDDEN_PATTERNS:
-        if re.search(pattern, lower):
-            logger.warning(f"SAFETY VIOLATION detected in LLM output: pattern='{pattern}'")
+    for literal in _FORBIDDEN_LITERALS:
+        if literal in lower:
+            logger.warning(f"SAFETY VIOLATION detected in LLM output: pattern='{literal}'")
             return False
+    if not any(k in lower for k in _FORBIDDEN_KEYWORDS):
+        return True
+    m = _FORBIDDEN_RE.search(lower)
+    if m:
+        pattern = _FORBIDDEN_SOURCES[int(m.lastgroup[2:])]
+        logger.warning(f"SAFETY VIOLATION detected in LLM output: pattern='{pattern}'")
+        return False
     return True
 
 
@@ -317,29 +529,30 @@ Return JSON only in this shape:
 #  Main Analysis Pipeline
 # ═══════════════════════════════════════════════════════════════════════════
 
-def analyze_intent(text: str, history: Optional[list[dict]] = None, structured_data: Optional[dict] = None) -> IntentResult:
-    """
-    Orchestration-ready intent analysis with Deterministic State Merging.
-    1. Deterministic checks (Greetings, Red Flags).
-    2. Structured Data Ingestion (Tier 0.5)
-    3. LLM Extraction (Multi-condition, with chat history).
-    4. Deterministic State Merge (Tier 3.5).
-    5. Post-LLM Safety Validation (Sanitization).
-    6. Clarification Loop Prevention.
-    7. Fallback/Validation.
-    """
-    stripped = (text or "").strip()
-    lower = stripped.lower()
-
+def _parse_structured_data(structured_data: Optional[dict]) -> tuple[List[ClinicalIssue], Dict[str, Any]]:
+    """Previous issues + normalized field answers carried in structured_data."""
     previous_issues: List[ClinicalIssue] = []
     if structured_data and "issues" in structured_data:
         for i_data in structured_data["issues"]:
             try:
-                previous_issues.append(ClinicalIssue(**i_data))
+                # Unknown client-side keys are dropped rather than discarding the issue
+                previous_issues.append(ClinicalIssue(**{
+                    k: v for k, v in i_data.items() if k in _ISSUE_FIELD_NAMES
+                }))
             except Exception:
                 continue
     structured_answers = _normalize_structured_answers(structured_data)
+    return previous_issues, structured_answers
+
 
+def _deterministic_intent(
+    stripped: str,
+    lower: str,
+    history: Optional[list[dict]],
+    previous_issues: List[ClinicalIssue],
+    structured_answers: Dict[str, Any],
+) -> Optional[IntentResult]:
+    """Tiers 0–2: answer without the LLM when possible, else None."""
     # ── Tier 0: Empty Input ─────────────────────────────────────────
     if len(stripped) < 1 and not (previous_issues or structured_answers):
         return IntentResult(
@@ -385,6 +598,7 @@ def analyze_intent(text: str, history: Optional[list[dict]] = None, structured_d
             )
 
         # Deterministic gate on merged state.
+        _assess_issues(merged_issues)
         if merged_issues and all(_backend_completion_check(issue) for issue in merged_issues):
             return IntentResult(
                 issues=merged_issues,
@@ -403,41 +617,59 @@ def analyze_intent(text: str, history: Optional[list[dict]] = None, structured_d
             requires_clarification=True,
         )
 
-    # ── Tier 1: Deterministic Red Flags (Safety First) ──────────────
-    for pat in _RED_FLAGS:
-        if re.search(pat, lower):
-            return IntentResult(
-                overall_urgency="EMERGENCY",
-                safety_flag=True,
-                action_type="ESCALATE", # Fixed from EMERGENCY
-                issues=[
-                    ClinicalIssue(
-                        symptom_cluster=stripped,
-                        suspected_category="Emergency",
-                        urgency="EMERGENCY",
-                        reasoning=f"Red flag detected via regex: {pat}"
-                    )
-                ]
-            )
-
-    # ── Tier 2: Deterministic Greeting / Small Talk ─────────────────
-    if len(stripped.split()) < 10:
-        for pat in _GREETING_PATTERNS:
-            if re.match(pat, lower):
-                return IntentResult(
-                    action_type="GREETING",
-                    issues=[]
-                )
-        for pat in _SMALL_TALK_PATTERNS:
-            if re.match(pat, lower):
-                return IntentResult(
-                    action_type="SMALL_TALK",
-                    issues=[]
+    # ── Tier 1 + 2: Deterministic Red Flags / Greeting / Small Talk ─
+    word = lower.rstrip(_TRAILING_PUNCT)
+    if word in _GREETING_WORDS:
+        return IntentResult(action_type="GREETING", issues=[])
+    if word in _SMALL_TALK_WORDS:
+        return IntentResult(action_type="SMALL_TALK", issues=[])
+
+    m = None
+    if lower[:1] in _TIER2_FIRST_CHARS or any(k in lower for k in _RED_FLAG_KEYWORDS):
+        m = _TIER_COMBINED_RE.search(lower)
+    if m and m.lastgroup.startswith("rf"):
+        # Red flags (Safety First) — report the matched phrase, not the pattern
+        return IntentResult(
+            overall_urgency="EMERGENCY",
+            safety_flag=True,
+            action_type="ESCALATE", # Fixed from EMERGENCY
+            issues=[
+                ClinicalIssue(
+                    symptom_cluster=stripped,
+                    suspected_category="Emergency",
+                    urgency="EMERGENCY",
+                    reasoning=f"Red flag detected via regex: {m.group(0)!r}"
                 )
+            ]
+        )
+    if m:
+        return IntentResult(
+            action_type="GREETING" if m.lastgroup == "gr" else "SMALL_TALK",
+            issues=[]
+        )
+
+    # ── Tier 2.5: No clinical signal on a fresh conversation ────────
+    if (
+        not history and not previous_issues and not structured_answers
+        and len(lower.split()) < _SMALL_TALK_MAX_WORDS
+        and not _CLINICAL_SIGNAL_RE.search(lower)
+    ):
+        return IntentResult(
+            requires_clarification=True,
+            clarification_questions=["Please describe your dental concern so I can assist you."],
+            action_type="CLARIFY",
+        )
 
-    # ── Tier 3: LLM Extraction ──────────────────────────────────────
-    intent = _llm_analyze(stripped, history)
+    return None
 
+
+def _finalize_intent(
+    intent: Optional[IntentResult],
+    history: Optional[list[dict]],
+    previous_issues: List[ClinicalIssue],
+    structured_answers: Dict[str, Any],
+) -> IntentResult:
+    """Tiers 3.5–4: merge, sanitize and gate the LLM extraction."""
     if not intent:
         # Fallback
         return IntentResult(
@@ -486,6 +718,7 @@ def analyze_intent(text: str, history: Optional[list[dict]] = None, structured_d
         intent.clarification_questions = []
         return intent
 
+    _assess_issues(intent.issues)
     if intent.issues and all(_backend_completion_check(issue) for issue in intent.issues):
         intent.action_type = "ROUTE"
         intent.completion_status = "COMPLETE"
@@ -502,28 +735,76 @@ def analyze_intent(text: str, history: Optional[list[dict]] = None, structured_d
     return intent
 
 
+def _cache_intent(cache_key: tuple, intent: Optional[IntentResult]) -> None:
+    # Failed calls and the safety fallback are retried next time; danger flags
+    # escalate in _finalize_intent, so never serve those from cache either
+    if (
+        intent
+        and not intent.safety_flag
+        and not any(i.airway_compromise or i.bleeding for i in intent.issues)
+    ):
+        intent_cache.put(cache_key, intent)
+
+
+async def analyze_intent(
+    text: str,
+    history: Optional[list[dict]] = None,
+    structured_data: Optional[dict] = None,
+) -> IntentResult:
+    """
+    Orchestration-ready intent analysis with Deterministic State Merging.
+    1. Deterministic checks (Greetings, Red Flags).
+    2. Structured Data Ingestion (Tier 0.5)
+    3. LLM Extraction (Multi-condition, with chat history).
+    4. Deterministic State Merge (Tier 3.5).
+    5. Post-LLM Safety Validation (Sanitization).
+    6. Clarification Loop Prevention.
+    7. Fallback/Validation.
+    """
+    stripped = (text or "").strip()
+    lower = stripped.lower()
+    previous_issues, structured_answers = _parse_structured_data(structured_data)
+
+    early = _deterministic_intent(stripped, lower, history, previous_issues, structured_answers)
+    if early is not None:
+        return early
+
+    # ── Tier 3: LLM Extraction (LFU-cached on text + recent history) ─
+    # Trim once here; the cache key and the prompt both use the same window
+    recent = history[-_HISTORY_WINDOW:] if history else None
+    cache_key = intent_cache.make_key(lower, recent)
+    intent = intent_cache.get(cache_key)
+    if intent is None:
+        intent = await _llm_analyze(stripped, recent)
+        _cache_intent(cache_key, intent)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Intent cache miss: %s", intent_cache.stats())
+
+    return _finalize_intent(intent, history, previous_issues, structured_answers)
+
+
 from core import clinical_gate
 
+def _assess_issues(issues: List[ClinicalIssue]) -> None:
+    """
+    Run the Clinical Gate Assessment once per issue. Both the completion check
+    and _deterministic_questions read its output, so callers assess up front
+    instead of each helper re-assessing the same unchanged issue.
+    """
+    for issue in issues:
+        clinical_gate.assess_issue_completeness(issue)
+
+
 def _backend_completion_check(issue: ClinicalIssue) -> bool:
     """
     Deterministic check: If we have location + urgency + reported symptoms,
     we deem the issue COMPLETE regardless of LLM opinion.
     
     Updated to use Clinical Gate Logic + Domain-Aware Strictness.
+    Expects the issue to have been through _assess_issues.
     """
-    # Run the Gate Assessment
-    clinical_gate.assess_issue_completeness(issue)
-    
-    # Require at least 3 structured elements before routing
-    structured_count = sum(
-        1 for k, v in issue.clinical_profile.items() if v
-    )
-
-    if structured_count < 3:
-        return False
-    
-    # Check if there are any missing elements
-    return len(issue.missing_clinical_elements) == 0
+    # No missing elements, and at least 3 structured elements before routing
+    return not issue.missing_clinical_elements and sum(map(bool, issue.clinical_profile.values())) >= 3
 
 
 def _answered_field_keys(issue: ClinicalIssue) -> set[str]:
@@ -534,15 +815,16 @@ def _answered_field_keys(issue: ClinicalIssue) -> set[str]:
 def _deterministic_questions(issues: List[ClinicalIssue]) -> List[str]:
     questions: List[str] = []
     seen = set()
-    for issue in issues:
-        clinical_gate.assess_issue_completeness(issue)
+    for issue in issues:  # already assessed by _assess_issues
+        if not issue.missing_clinical_elements:
+            continue
         answered = _answered_field_keys(issue)
-        if issue.missing_clinical_elements:
-            issue.missing_clinical_elements = [
-                key for key in issue.missing_clinical_elements
-                if str(key).strip().lower() not in answered
-            ]
+        issue.missing_clinical_elements = [
+            key for key in issue.missing_clinical_elements
+            if str(key).strip().lower() not in answered
+        ]
         q = clinical_gate.get_next_clinical_question(issue) if issue.missing_clinical_elements else None
+        # Order-preserving dedup as questions are produced
         if q and q not in seen:
             seen.add(q)
             questions.append(q)
@@ -586,8 +868,10 @@ def _merge_with_previous_issues(
             new.field_answers = {**old.field_answers, **(new.field_answers or {})}
         
         # Merge lists
+        existing = set(new.reported_symptoms)
         for s in old.reported_symptoms:
-            if s not in new.reported_symptoms:
+            if s not in existing:
+                existing.add(s)
                 new.reported_symptoms.append(s)
 
         merged.append(new)
@@ -600,107 +884,136 @@ def _merge_with_previous_issues(
     return merged
 
 
-def _llm_analyze(text: str, history: Optional[list[dict]] = None) -> Optional[IntentResult]:
-    """Call Gemini with orchestration prompt, including chat history for context."""
+# One client per process so HTTP connections/TLS sessions are reused across turns
+_genai_client: Optional[genai.Client] = None
+_genai_client_lock = threading.Lock()
+
+# ```json\n{...}\n``` -> {...}
+_FENCE_RE = re.compile(r"^```[^\n]*\n(.*?)(?:```)?$", re.S)
+
+_GENERATE_CONFIG = genai.types.GenerateContentConfig(
+    system_instruction=_SYSTEM_PROMPT,
+    temperature=0.0,  # Strict determinism
+    max_output_tokens=1500,
+    response_mime_type="application/json"
+)
+
+
+def _get_genai_client() -> genai.Client:
+    global _genai_client
+    if _genai_client is None:
+        with _genai_client_lock:
+            if _genai_client is None:
+                _genai_client = genai.Client(api_key=GEMINI_API_KEY)
+    return _genai_client
+
+
+_HISTORY_WINDOW = 10  # messages of chat history sent with each prompt
+
+
+def _build_llm_prompt(text: str, history: Optional[list[dict]] = None) -> str:
+    """
+    User message prefixed with recent chat history for context.
+    `history` arrives already trimmed to _HISTORY_WINDOW by analyze_intent.
+    """
+    # ── Build Context with Chat History ─────────────────────────
+    if not history:
+        return text
+
+    # One list, one join: no intermediate history block string
+    parts = ["CONVERSATION HISTORY:"]
+    for m in history:
+        role = m.get("role", "user").upper()
+        content = m.get("content", "")
+        # Truncate very long messages to save tokens
+        if len(content) > 300:
+            content = content[:300] + "..."
+        parts.append(f"{role}: {content}")
+    parts.append("")
+    parts.append("CURRENT USER MESSAGE:")
+    parts.append(text)
+    return "\n".join(parts)
+
+
+def _safety_fallback() -> IntentResult:
+    logger.warning("LLM output failed safety validation. Returning safe fallback.")
+    return IntentResult(
+        requires_clarification=True,
+        clarification_questions=[
+            "I'd like to understand your symptoms better so I can connect you with the right specialist.",
+            "Could you describe what you're experiencing?"
+        ],
+        action_type="CLARIFY", # Fixed to CLARIFY
+        overall_urgency="MEDIUM",
+        safety_flag=True,  # Marks the fallback so it is never cached
+    )
+
+
+def _parse_llm_output(raw_text: str) -> IntentResult:
+    """Safety-check and parse the raw Gemini reply into an IntentResult."""
+    raw_text = raw_text.strip()
+
+    # ── Post-LLM Safety Validation ──────────────────────────────
+    if not _validate_safety(raw_text):
+        return _safety_fallback()
+
+    # ── Parse JSON ──────────────────────────────────────────────
+    # JSON mime type should yield bare JSON; tolerate a fenced reply anyway
+    m = _FENCE_RE.match(raw_text)
+    if m:
+        raw_text = m.group(1)
+
+    data = orjson.loads(raw_text)
+
+    # ── Parse Issues ────────────────────────────────────────────
+    issues = [ClinicalIssue.from_llm_dict(i) for i in data.get("issues", [])]
+
+    return IntentResult(
+        issues=issues,
+        overall_urgency=data.get("overall_urgency"),
+        requires_clarification=False,
+        clarification_questions=[],
+        safety_flag=False,
+        action_type="UNKNOWN",
+        patient_sentiment=data.get("patient_sentiment", "Neutral"),
+        completion_status="INCOMPLETE",
+    )
+
+
+# Chars of the previous chunk rescanned with each new one; longer than any
+# forbidden phrase, so a violation split across chunks is still caught early
+_STREAM_SCAN_OVERLAP = 64
+
+
+async def _llm_analyze(text: str, history: Optional[list[dict]] = None) -> Optional[IntentResult]:
+    """
+    Call Gemini with orchestration prompt, including chat history for context.
+    Awaited on the client's aio surface so no thread is held for the round-trip.
+    The reply is streamed: each chunk is safety-scanned as it arrives and the
+    stream is abandoned on the first violation instead of waiting for the tail.
+    """
     if not GEMINI_API_KEY:
         logger.error("GEMINI_API_KEY not found.")
         return None
 
     try:
-        # ── Build Context with Chat History ─────────────────────────
-        context = ""
-        if history:
-            # Use up to last 10 messages for stronger multi-turn state continuity.
-            recent = history[-10:]
-            context_lines = []
-            for m in recent:
-                role = m.get("role", "user").upper()
-                content = m.get("content", "")
-                # Truncate very long messages to save tokens
-                if len(content) > 300:
-                    content = content[:300] + "..."
-                context_lines.append(f"{role}: {content}")
-            context = "CONVERSATION HISTORY:\n" + "\n".join(context_lines) + "\n\nCURRENT USER MESSAGE:\n"
-
-        full_prompt = context + text
-
-        import google.genai as genai
-        client = genai.Client(api_key=GEMINI_API_KEY)
-
-        response = client.models.generate_content(
+        stream = await _get_genai_client().aio.models.generate_content_stream(
             model=GEMINI_MODEL,
-            contents=full_prompt,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=_SYSTEM_PROMPT,
-                temperature=0.0,  # Strict determinism
-                max_output_tokens=1500,
-                response_mime_type="application/json"
-            ),
-        )
-
-        raw_text = response.text.strip()
-
-        # ── Post-LLM Safety Validation ──────────────────────────────
-        if not _validate_safety(raw_text):
-            logger.warning("LLM output failed safety validation. Returning safe fallback.")
-            return IntentResult(
-                requires_clarification=True,
-                clarification_questions=[
-                    "I'd like to understand your symptoms better so I can connect you with the right specialist.",
-                    "Could you describe what you're experiencing?"
-                ],
-                action_type="CLARIFY", # Fixed to CLARIFY
-                overall_urgency="MEDIUM"
-            )
-
-        # ── Parse JSON ──────────────────────────────────────────────
-        if raw_text.startswith("```"):
-            raw_text = raw_text.split("\n", 1)[1]
-            if raw_text.endswith("```"):
-                raw_text = raw_text[:-3]
-
-        data = json.loads(raw_text)
-
-        # ── Parse Issues ────────────────────────────────────────────
-        issues = []
-        for i in data.get("issues", []):
-            urgency = i.get("urgency", "MEDIUM")
-            if urgency not in {"HIGH", "MEDIUM", "LOW"}:
-                urgency = "MEDIUM"
-            issues.append(ClinicalIssue(
-                symptom_cluster=i.get("symptom_cluster", "Unknown symptoms"),
-                urgency=urgency,
-                reasoning=i.get("reasoning", ""),
-                
-                # Feature Flags
-                has_pain=i.get("has_pain", False),
-                severity=i.get("severity"),
-                duration_days=i.get("duration_days"),
-                thermal_sensitivity=i.get("thermal_sensitivity", False),
-                biting_pain=i.get("biting_pain", False),
-                swelling=i.get("swelling", False),
-                visible_swelling=i.get("visible_swelling", False),
-                airway_compromise=i.get("airway_compromise", False),
-                trauma=i.get("trauma", False),
-                bleeding=i.get("bleeding", False),
-                impacted_wisdom=i.get("impacted_wisdom", False),
-                
-                # Metadata
-                location=i.get("location"),
-                reported_symptoms=i.get("reported_symptoms", []),
-                suspected_category=i.get("suspected_category") # Optional/Deprecated
-            ))
-
-        return IntentResult(
-            issues=issues,
-            overall_urgency=data.get("overall_urgency"),
-            requires_clarification=False,
-            clarification_questions=[],
-            safety_flag=False,
-            action_type="UNKNOWN",
-            patient_sentiment=data.get("patient_sentiment", "Neutral"),
-            completion_status="INCOMPLETE",
+            contents=_build_llm_prompt(text, history),
+            config=_GENERATE_CONFIG,
         )
+        parts: List[str] = []
+        tail = ""
+        async for chunk in stream:
+            piece = chunk.text or ""
+            window = tail + piece
+            if not _validate_safety(window):
+                await stream.aclose()
+                return _safety_fallback()
+            parts.append(piece)
+            tail = window[-_STREAM_SCAN_OVERLAP:]
+        # Full-text scan + parse; also catches anything the windows missed
+        return _parse_llm_output("".join(parts))
 
     except Exception as e:
         logger.error(f"LLM Analysis failed: {e}")
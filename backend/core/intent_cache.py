@@ -0,0 +1,136 @@
+"""
+Intent Cache — LFU cache of LLM extraction results.
+Repeated utterances ("yes", echoed descriptions, double submits) with the same
+recent history skip the Gemini call entirely. Process-local and thread-safe.
+Entries expire after _TTL_SECONDS so prompt/model changes age out on their own.
+"""
+import copy
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_CAPACITY = 50_000
+_TTL_SECONDS = 600
+_WS_RE = re.compile(r"\s+")
+_TRAILING_PUNCT = " .!?,"
+
+
+class LFUCache:
+    """
+    O(1) least-frequently-used cache; ties are evicted least-recently-used.
+    Values are deep-copied in and out because callers mutate the results.
+    Expired entries (ttl seconds after their last put) are dropped on read.
+    """
+    def __init__(self, capacity: int, ttl: float = float("inf")):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: dict[Hashable, list] = {}  # key -> [value, freq, expires_at]
+        self._buckets: dict[int, OrderedDict] = {}  # freq -> keys in LRU order
+        self._min_freq = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _touch(self, key: Hashable, entry: list) -> None:
+        freq = entry[1]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        entry[1] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def _expire(self, key: Hashable, entry: list) -> None:
+        freq = entry[1]
+        bucket = self._buckets[freq]
+        del bucket[key]
+        del self._entries[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = min(self._buckets, default=0)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.monotonic():
+                self._expire(key, entry)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, entry)
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        value = copy.deepcopy(value)
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] = value
+                entry[2] = expires_at
+                self._touch(key, entry)
+                return
+            if len(self._entries) >= self.capacity:
+                bucket = self._buckets[self._min_freq]
+                evicted, _ = bucket.popitem(last=False)
+                if not bucket:
+                    del self._buckets[self._min_freq]
+                del self._entries[evicted]
+            self._entries[key] = [value, 1, expires_at]
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._min_freq = 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._min_freq = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache = LFUCache(_CAPACITY, _TTL_SECONDS)
+
+
+def make_key(lower: str, history: Optional[list[dict]]) -> tuple:
+    """
+    (blake2b of the whitespace-collapsed text minus trailing punctuation,
+    (role, hash(content)) per history message). Digests keep long pasted
+    messages out of memory.
+    `lower` is the already stripped + lowercased message and `history` the
+    already-trimmed window that analyze_intent sends to the model.
+    """
+    normalized = _WS_RE.sub(" ", lower).rstrip(_TRAILING_PUNCT)
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+    recent = tuple((m.get("role", "user"), hash(str(m.get("content", "")))) for m in history or ())
+    return digest, recent
+
+
+def get(key: tuple) -> Optional[Any]:
+    return _cache.get(key)
+
+
+def put(key: tuple, value: Any) -> None:
+    _cache.put(key, value)
+
+
+def clear() -> None:
+    _cache.clear()
+
+
+def stats() -> dict:
+    """Hit/miss counters and current size, for logging cache effectiveness."""
+    return {"hits": _cache.hits, "misses": _cache.misses, "size": len(_cache)}
@@ -7,8 +7,35 @@ Optimizer — Scores and ranks slot options by priority:
 4. Earliest availability
 5. Fewest total visits
 """
+import heapq
+from datetime import date
+
 from core.scheduling_engine import SlotOption
 
+_TOP_N = 10
+# Ranked candidates pulled before dedup; falls back to a full sort if
+# duplicates leave fewer than _TOP_N unique slots in the pool
+_CANDIDATE_POOL = 3 * _TOP_N
+
+
+def _rank_key(s: SlotOption):
+    # Score descending, then date/time ascending
+    return (-s.score, s.date, s.time)
+
+
+def _dedupe(ranked: list[SlotOption]) -> list[SlotOption]:
+    """Keep the first _TOP_N unique date+time+doctor+type combinations."""
+    seen = set()
+    unique = []
+    for s in ranked:
+        key = (s.date, s.time, s.doctor_id, s.type)
+        if key not in seen:
+            seen.add(key)
+            unique.append(s)
+            if len(unique) >= _TOP_N:
+                break
+    return unique
+
 
 def optimize_slots(
     slots: list[SlotOption],
@@ -16,6 +43,11 @@ def optimize_slots(
     preferred_doctor_id: str | None = None,
 ) -> list[SlotOption]:
     """Score and sort slots according to optimization priority order."""
+    today = date.today()
+    # Candidates share a handful of dates and start times, so each distinct
+    # value is parsed (and validated) once; the per-slot path has no try
+    date_bonus: dict[str, float] = {}
+    time_bonus: dict[str, float] = {}
 
     for slot in slots:
         score = 0.0
@@ -33,20 +65,25 @@ def optimize_slots(
             score += 20
 
         # 4. Earlier date = higher score (inverse of day offset)
-        try:
-            from datetime import date as dt_date
-            slot_date = dt_date.fromisoformat(slot.date)
-            today = dt_date.today()
-            days_away = (slot_date - today).days
-            score += max(0, 20 - days_away)  # Up to 20 points for sooner
-        except Exception:
-            pass
+        bonus = date_bonus.get(slot.date)
+        if bonus is None:
+            try:
+                days_away = (date.fromisoformat(slot.date) - today).days
+                bonus = max(0, 20 - days_away)  # Up to 20 points for sooner
+            except (TypeError, ValueError):
+                bonus = 0
+            date_bonus[slot.date] = bonus
+        score += bonus
 
         # 5. Earlier time within same day
-        try:
-            score += max(0, (17 - int(slot.time.split(":")[0])) * 0.5)
-        except Exception:
-            pass
+        bonus = time_bonus.get(slot.time)
+        if bonus is None:
+            try:
+                bonus = max(0, (17 - int(slot.time[:2])) * 0.5)  # "HH:MM"
+            except (TypeError, ValueError):
+                bonus = 0
+            time_bonus[slot.time] = bonus
+        score += bonus
 
         # 6. Single-visit bonus (COMBO already gets this)
         if slot.type == "SINGLE":
@@ -54,18 +91,10 @@ def optimize_slots(
 
         slot.score = score
 
-    # Sort by score descending, then date ascending
-    slots.sort(key=lambda s: (-s.score, s.date, s.time))
-
-    # Deduplicate: keep top 10 unique date+time combinations
-    seen = set()
-    unique = []
-    for s in slots:
-        key = (s.date, s.time, s.doctor_id, s.type)
-        if key not in seen:
-            seen.add(key)
-            unique.append(s)
-            if len(unique) >= 10:
-                break
-
+    # Only the head of the ranking is kept, so select it in O(n log k)
+    if len(slots) <= _CANDIDATE_POOL:
+        return _dedupe(sorted(slots, key=_rank_key))
+    unique = _dedupe(heapq.nsmallest(_CANDIDATE_POOL, slots, key=_rank_key))
+    if len(unique) < _TOP_N:
+        unique = _dedupe(sorted(slots, key=_rank_key))
     return unique
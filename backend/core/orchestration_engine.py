@@ -6,9 +6,11 @@ enforces room/equipment/anesthetist constraints via the scheduling engine,
 and offers combined slots where possible.
 """
 import re
+import time
 from dataclasses import dataclass, asdict, field
 from typing import List, Optional, Dict
 from uuid import UUID
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import logging
 
@@ -44,6 +46,27 @@ class RoutedIssue:
     fallback_tier: int = 0               # 0=not searched, 1=primary, 2=alt provider, 3=palliative
     fallback_note: Optional[str] = None
 
+@dataclass(slots=True, frozen=True)
+class ProcRow:
+    """
+    Plain column snapshot of a Procedure row (no ORM identity map / instrumentation).
+    Frozen because one instance is shared across requests via _proc_cache.
+    """
+    proc_id: int
+    tenant_id: Optional[UUID]
+    name: str
+    base_duration_minutes: int
+    consult_duration_minutes: int
+    required_spec_id: Optional[int]
+    required_room_capability: Optional[dict]
+    requires_anesthetist: bool
+    allow_same_day_combo: bool
+
+    def room_capability_copy(self) -> Optional[dict]:
+        """Per-request copy of required_room_capability (the cached dict is shared)."""
+        caps = self.required_room_capability
+        return dict(caps) if caps is not None else None
+
 @dataclass
 class OrchestrationPlan:
     is_emergency: bool
@@ -163,6 +186,7 @@ def _validate_clinical_completeness(intent: IntentResult) -> Optional[List[str]]
     Returns a list of ONE or more questions if incomplete.
     """
     questions = []
+    seen = set()
     
     # If the user explicitly asks for clarification or help, we might want to respect that
     # But generally we want to drive the clinical interview.
@@ -172,21 +196,14 @@ def _validate_clinical_completeness(intent: IntentResult) -> Optional[List[str]]
         clinical_gate.assess_issue_completeness(issue)
         clinical_gate.prune_answered_elements(issue)
         
-        # 2. Get Next Question (Sequential)
+        # 2. Get Next Question (Sequential), deduplicated as it is produced
         if issue.missing_clinical_elements:
             q = clinical_gate.get_next_clinical_question(issue)
-            if q:
+            if q and q not in seen:
+                seen.add(q)
                 questions.append(q)
-                
-    # Deduplicate
-    seen = set()
-    unique_questions = []
-    for q in questions:
-        if q not in seen:
-            seen.add(q)
-            unique_questions.append(q)
 
-    return unique_questions if unique_questions else None
+    return questions if questions else None
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -212,49 +229,55 @@ def _classify_condition(issue: ClinicalIssue) -> tuple[str, List[str]]:
     if triggers:
         return "emergency", triggers
     
+    # Feature flags read once; every tier below tests the same few fields
+    has_pain = issue.has_pain
+    swelling = issue.swelling
+    thermal = issue.thermal_sensitivity
+    severity = issue.severity or 0
+    cluster = (issue.symptom_cluster or "").lower()
+
     # ── Tier 2: Endodontic Rules (Root Canal) ─────────────────────────────────
-    is_severe = (issue.severity or 0) >= 7
-    if issue.has_pain:
+    is_severe = severity >= 7
+    if has_pain:
         if is_severe: triggers.append("Severe pain")
-        if issue.thermal_sensitivity: triggers.append("Thermal sensitivity")
+        if thermal: triggers.append("Thermal sensitivity")
         if issue.biting_pain: triggers.append("Biting pain")
         
-        if is_severe and (issue.thermal_sensitivity or issue.biting_pain) and not issue.swelling:
+        if is_severe and (thermal or issue.biting_pain) and not swelling:
             return "root_canal", triggers
 
     # ── Tier 3: Surgical Rules (Wisdom/Extraction) ────────────────────────────
     triggers = [] # Reset for new classification attempt
-    if issue.swelling: triggers.append("Swelling")
+    if swelling: triggers.append("Swelling")
     if issue.impacted_wisdom: triggers.append("Impacted wisdom")
-    if "wisdom" in (issue.symptom_cluster or "").lower(): triggers.append("Wisdom tooth cluster")
+    if "wisdom" in cluster: triggers.append("Wisdom tooth cluster")
     
-    if issue.swelling and (issue.impacted_wisdom or "wisdom" in (issue.symptom_cluster or "").lower()):
+    if swelling and (issue.impacted_wisdom or "wisdom" in cluster):
         return "wisdom_extraction", triggers
         
-    if issue.swelling and "extraction" in (issue.symptom_cluster or "").lower():
+    if swelling and "extraction" in cluster:
          triggers.append("Extraction mentioned")
          return "wisdom_extraction", triggers
 
     # ── Tier 4: Restorative Rules (Fillings) ──────────────────────────────────
     triggers = []
-    if issue.has_pain: triggers.append("Pain")
-    if (issue.severity or 0) <= 6: triggers.append("Moderate severity")
+    is_moderate = severity <= 6
+    if has_pain: triggers.append("Pain")
+    if is_moderate: triggers.append("Moderate severity")
     
-    if issue.has_pain and (issue.severity or 0) <= 6 and not issue.swelling and not issue.thermal_sensitivity:
+    if has_pain and is_moderate and not swelling and not thermal:
         return "filling", triggers
         
     # ── Tier 5: General Fallback ──────────────────────────────────────────────
-    triggers = []
-    symptoms = (issue.symptom_cluster or "").lower()
-    if "root canal" in symptoms: 
+    if "root canal" in cluster: 
         return "root_canal", ["Root canal keyword"]
-    if "wisdom" in symptoms: 
+    if "wisdom" in cluster: 
         return "wisdom_extraction", ["Wisdom tooth keyword"]
-    if "crown" in symptoms: 
+    if "crown" in cluster: 
         return "crown", ["Crown keyword"]
-    if "filling" in symptoms: 
+    if "filling" in cluster: 
         return "filling", ["Filling keyword"]
-    if "clean" in symptoms: 
+    if "clean" in cluster: 
         return "general_checkup", ["Cleaning/Hygiene keyword"]
 
     return "general_checkup", ["Routine follow-up"]
@@ -263,33 +286,86 @@ def _classify_condition(issue: ClinicalIssue) -> tuple[str, List[str]]:
 #  Layer 3: Procedure Resolution (DB Lookup)
 # ═══════════════════════════════════════════════════════════════════════════
 
+# Same order as the ProcRow fields
+_PROC_COLS = (
+    Procedure.proc_id,
+    Procedure.tenant_id,
+    Procedure.name,
+    Procedure.base_duration_minutes,
+    Procedure.consult_duration_minutes,
+    Procedure.required_spec_id,
+    Procedure.required_room_capability,
+    Procedure.requires_anesthetist,
+    Procedure.allow_same_day_combo,
+)
+
+
+# Procedures are only written by seeding, so resolved rows are cached per
+# process, keyed by (tenant_id, procedure name). Misses and cross-tenant
+# fallback rows are not cached, so a tenant's own procedure is picked up as
+# soon as it is seeded.
+_PROC_CACHE_TTL_SECONDS = 300
+_proc_cache: Dict[tuple, tuple[float, ProcRow]] = {}
+
+
 def _resolve_procedure(
     db: Session,
     condition_key: str,
     tenant_id: UUID | None
-) -> Optional[Procedure]:
+) -> Optional[ProcRow]:
     """
     Maps Condition Key -> Real DB Procedure.
     Returns None if no matching procedure found.
     """
-    proc_name = CONDITION_PROCEDURE_MAP.get(condition_key)
-    if not proc_name:
-        # Fallback for unmapped conditions
-        proc_name = "General Checkup"
-        
-    # 1. Tenant-Scoped Lookup
-    query = db.query(Procedure).filter(Procedure.name == proc_name)
-    if tenant_id:
-        query = query.filter(Procedure.tenant_id == tenant_id)
-    
-    proc = query.first()
-    
-    # 2. Cross-Tenant Fallback (if applicable configuration allows)
-    # For strict isolation, we might disable this, but keeping it for safety in dev.
-    if not proc and tenant_id:
-        proc = db.query(Procedure).filter(Procedure.name == proc_name).first()
-        
-    return proc
+    return _resolve_procedures_batch(db, [condition_key], tenant_id)[condition_key]
+
+
+def _resolve_procedures_batch(
+    db: Session,
+    condition_keys: List[str],
+    tenant_id: UUID | None
+) -> Dict[str, Optional[ProcRow]]:
+    """
+    Batched _resolve_procedure: Condition Key -> Real DB Procedure for every key.
+    Names not in the process cache are fetched with one tenant-scoped IN-query,
+    plus one cross-tenant fallback query for any misses.
+    """
+    # Unmapped conditions fall back to General Checkup
+    names = {key: CONDITION_PROCEDURE_MAP.get(key) or "General Checkup" for key in condition_keys}
+    now = time.monotonic()
+    by_name: Dict[str, Optional[ProcRow]] = {}
+    for name in set(names.values()):
+        cached = _proc_cache.get((tenant_id, name))
+        if cached is not None and cached[0] > now:
+            by_name[name] = cached[1]
+    wanted = set(names.values()) - by_name.keys()
+
+    if wanted:
+        found: Dict[str, ProcRow] = {}
+        # 1. Tenant-Scoped Lookup
+        stmt = select(*_PROC_COLS).where(Procedure.name.in_(wanted))
+        if tenant_id:
+            stmt = stmt.where(Procedure.tenant_id == tenant_id)
+        for row in db.execute(stmt):
+            if row.name not in found:
+                found[row.name] = ProcRow(*row)
+
+        # 2. Cross-Tenant Fallback (if applicable configuration allows)
+        # For strict isolation, we might disable this, but keeping it for safety in dev.
+        missing = wanted - found.keys()
+        if missing and tenant_id:
+            for row in db.execute(select(*_PROC_COLS).where(Procedure.name.in_(missing))):
+                if row.name not in found:
+                    found[row.name] = ProcRow(*row)
+
+        expires_at = now + _PROC_CACHE_TTL_SECONDS
+        for name in wanted:
+            proc = found.get(name)
+            by_name[name] = proc
+            if proc is not None and (tenant_id is None or proc.tenant_id == tenant_id):
+                _proc_cache[(tenant_id, name)] = (expires_at, proc)
+
+    return {key: by_name[name] for key, name in names.items()}
 
 # ═══════════════════════════════════════════════════════════════════════════
 #  Layer 4: Constraint-Aware Scheduler (Wrapper)
@@ -297,7 +373,7 @@ def _resolve_procedure(
 
 def _find_slots(
     db: Session,
-    procedure: Procedure,
+    procedure: ProcRow,
     issue: ClinicalIssue,
     tenant_id: UUID | None
 ) -> Optional[dict]:
@@ -315,6 +391,12 @@ def _find_slots(
         tenant_id=tenant_id
     )
 
+
+# Deterministic urgency ordering used to pick the plan's overall urgency
+_URGENCY_RANK = {"EMERGENCY": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
+_URGENCY_BY_RANK = {rank: urgency for urgency, rank in _URGENCY_RANK.items()}
+
+
 def orchestrate(
     db: Session,
     intent: IntentResult,
@@ -325,7 +407,7 @@ def orchestrate(
     1. Semantic Extraction (Done in IntentResult)
     2. Clinical Gate (New Layer: Assessment & Intake)
     3. Clinical Rules (_classify_condition)
-    4. Procedure Resolution (_resolve_procedure)
+    4. Procedure Resolution (_resolve_procedures_batch)
     5. Constraint-Aware Scheduler (_find_slots)
     6. Orchestration Combiner (The Plan)
     """
@@ -416,14 +498,14 @@ def orchestrate(
     # Only reachable if validation_questions is None/Empty
     
     routed_issues = []
-    
-    for idx, issue in enumerate(intent.issues):
-        # Layer 2: Classify
-        condition_key, triggers = _classify_condition(issue)
+
+    # Layer 2: Classify every issue, then Layer 3: resolve all procedures in one query
+    classified = [_classify_condition(issue) for issue in intent.issues]
+    procedures = _resolve_procedures_batch(db, [key for key, _ in classified], tenant_id)
+
+    for idx, (issue, (condition_key, triggers)) in enumerate(zip(intent.issues, classified)):
         logger.info(f"Layer 2: Issue {idx} classified as '{condition_key}' (Triggers: {triggers})")
-        
-        # Layer 3: Resolve
-        proc = _resolve_procedure(db, condition_key, tenant_id)
+        proc = procedures[condition_key]
         
         triage_res = None
         slots = None
@@ -441,7 +523,7 @@ def orchestrate(
                  consult_minutes=proc.consult_duration_minutes,
                  treatment_minutes=proc.base_duration_minutes,
                  requires_sedation=issue.requires_sedation or proc.requires_anesthetist,
-                 room_capability=proc.required_room_capability,
+                 room_capability=proc.room_capability_copy(),
                  requires_anesthetist=proc.requires_anesthetist,
                  allow_combo=proc.allow_same_day_combo,
                  available_doctors=[] 
@@ -471,7 +553,7 @@ def orchestrate(
             procedure_name=display_name,
             duration_minutes=proc.base_duration_minutes if proc else 30,
             consult_minutes=proc.consult_duration_minutes if proc else 0,
-            room_capability=proc.required_room_capability if proc else None,
+            room_capability=proc.room_capability_copy() if proc else None,
             requires_sedation=issue.requires_sedation or (proc.requires_anesthetist if proc else False),
             requires_anesthetist=proc.requires_anesthetist if proc else False,
             slots=slots,
@@ -495,20 +577,13 @@ def orchestrate(
                  clinic_sets.append(single | combo)
         
         if clinic_sets:
-            shared = clinic_sets[0]
-            for cs in clinic_sets[1:]:
-                shared &= cs
+            shared = clinic_sets[0].intersection(*clinic_sets[1:])
             if shared:
                 can_combine = True
 
     # Deterministic Urgency
-    urgency_map = {"EMERGENCY": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
-    rev_map = {4: "EMERGENCY", 3: "HIGH", 2: "MEDIUM", 1: "LOW"}
-    max_urg = 1
-    for r in routed_issues:
-        u = urgency_map.get(r.urgency, 1)
-        if u > max_urg: max_urg = u
-    final_urgency = rev_map[max_urg]
+    max_urg = max((_URGENCY_RANK.get(r.urgency, 1) for r in routed_issues), default=1)
+    final_urgency = _URGENCY_BY_RANK[max_urg]
 
     # Calculate Enterprise Artifacts (FHIR + Safe Language)
     # We use the primary (highest urgency) issue for the main explanation/referral
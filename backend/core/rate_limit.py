@@ -1,3 +1,4 @@
+import secrets
 import time
 import redis
 from fastapi import Request, HTTPException, Depends
@@ -12,46 +13,65 @@ logger = logging.getLogger(__name__)
 # Decode responses=True so we get strings instead of bytes
 r = redis.from_url(REDIS_URL, decode_responses=True)
 
+# Sliding-window log in one atomic round-trip.
+# KEYS[1] = bucket key; ARGV = {now_ms, window_ms, limit, member}
+# Returns {allowed, count_including_this_request, retry_after_ms}
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return {1, count + 1, window}
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local retry = window
+if oldest[2] then
+    retry = tonumber(oldest[2]) + window - now
+end
+return {0, count + 1, retry}
+"""
+
+# Script object runs EVALSHA and reloads on NOSCRIPT transparently
+_sliding_window = r.register_script(_SLIDING_WINDOW_LUA)
+
+
 class RateLimiter:
     """
-    Redis-backed Rate Limiter using Fixed Window algorithm.
+    Redis-backed Rate Limiter using a Sliding Window Log.
     Structure:
       Key: prefix:identifier (e.g., "lim:ip:127.0.0.1")
-      Value: count
+      Value: sorted set of request timestamps (ms)
       TTL: window_seconds
+    Cleanup, counting and insertion happen in one Lua call (single RTT).
     """
     def __init__(self, key_prefix: str, limit: int, window: int):
         self.key_prefix = key_prefix
         self.limit = limit
         self.window = window
+        self._window_ms = window * 1000
+        self._key_head = f"{key_prefix}:"
 
     def is_allowed(self, identifier: str) -> tuple[bool, int, int]:
         """
         Checks if request is allowed.
         Returns: (allowed, current_count, ttl)
         """
-        key = f"{self.key_prefix}:{identifier}"
-        
+        key = self._key_head + identifier
+        now_ms = int(time.time() * 1000)
+        member = f"{now_ms}:{secrets.token_hex(4)}"
+
         try:
-            # Pipeline for atomicity
-            pipe = r.pipeline()
-            pipe.incr(key)
-            pipe.ttl(key)
-            result = pipe.execute()
-            
-            current_count = result[0]
-            ttl = result[1]
-            
-            # If key didn't exist, set expiry
-            if current_count == 1:
-                r.expire(key, self.window)
-                ttl = self.window
-            
-            if current_count > self.limit:
-                return False, current_count, ttl
-            
-            return True, current_count, ttl
-            
+            allowed, current_count, retry_ms = _sliding_window(
+                keys=[key], args=[now_ms, self._window_ms, self.limit, member]
+            )
+            ttl = max(1, -(-int(retry_ms) // 1000))  # ceil to whole seconds
+            return bool(allowed), int(current_count), ttl
+
         except redis.RedisError as e:
             logger.error(f"Redis error in rate limiter: {e}")
             # Fail open if Redis is down logic could be here, but usually better to fail open in production?
@@ -61,12 +81,13 @@ class RateLimiter:
 class RateLimitDependency:
     """
     FastAPI Dependency for Per-Route Rate Limiting.
+    Sync on purpose: the Redis round-trip runs in the threadpool, not on the event loop.
     """
     def __init__(self, limit: int, window: int, scope_func: Callable[[Request], str], key_prefix: str = "lim"):
         self.limiter = RateLimiter(key_prefix, limit, window)
         self.scope_func = scope_func
 
-    async def __call__(self, request: Request):
+    def __call__(self, request: Request):
         identifier = self.scope_func(request)
         allowed, count, ttl = self.limiter.is_allowed(identifier)
         
@@ -84,29 +105,18 @@ class AuthenticatedRateLimit:
     """
     Rate Limit depending on Authenticated User/Tenant.
     Scope can be "user" or "tenant".
+    Sync on purpose: get_current_user and the Redis call both block on I/O.
     """
     def __init__(self, limit: int, window: int, scope: str = "user", key_prefix: str = "lim"):
         self.limiter = RateLimiter(key_prefix, limit, window)
         self.scope = scope
+        self._by_tenant = scope == "tenant"
+        self._scope_head = f"{scope}:"
 
-    async def __call__(self, user: UserContext = Depends(get_current_user)):
-        if self.scope == "tenant":
-            identifier = str(user.tenant_id)
-            prefix = f"{self.limiter.key_prefix}:tenant"
-        else:
-            identifier = str(user.user_id)
-            prefix = f"{self.limiter.key_prefix}:user"
-            
-        # Use underlying limiter with modified key? 
-        # RateLimiter expects key_prefix + identifier.
-        # I passed key_prefix in init.
-        # So "lim:tenant-uuid" or "lim:user-uuid".
-        # But if scope is tenant, I want keys to be distinct from user scope if IDs clash (unlikely for UUIDs but good practice).
-        # Actually simplest: "lim:user:USER_ID" or "lim:tenant:TENANT_ID".
-        # RateLimiter uses f"{self.key_prefix}:{identifier}"
-        # So if I pass identifier="user:USER_ID", key becomes "lim:user:USER_ID".
-        
-        prefix_id = f"{self.scope}:{identifier}"
+    def __call__(self, user: UserContext = Depends(get_current_user)):
+        # Key becomes "lim:tenant:TENANT_ID" or "lim:user:USER_ID"
+        identifier = user.tenant_id if self._by_tenant else user.user_id
+        prefix_id = self._scope_head + str(identifier)
         allowed, count, ttl = self.limiter.is_allowed(prefix_id)
         
         if not allowed:
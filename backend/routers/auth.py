@@ -10,11 +10,12 @@ from sqlalchemy.orm import Session
 from core.auth import (
     hash_password,
     verify_password,
+    password_needs_rehash,
     validate_password_strength,
     create_access_token,
     decode_token,
 )
-from core.dependencies import get_current_user, get_db_session, UserContext
+from core.dependencies import get_current_user, get_db_session, revoke_cached_token, UserContext
 from models.models import (
     Clinic, User, AuditLog, TokenBlacklist, LoginAttempt, Patient,
 )
@@ -150,6 +151,10 @@ def login(data: LoginRequest, request: Request, db: Session = Depends(get_db_ses
     if attempt:
         db.delete(attempt)
 
+    # Transparently upgrade legacy bcrypt hashes to argon2id
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = hash_password(data.password)
+
     # Load clinic
     clinic = db.query(Clinic).filter(Clinic.clinic_id == user.tenant_id).first()
 
@@ -211,6 +216,7 @@ def logout(
         blacklist_entry.user_id = user.user_id
     
     db.add(blacklist_entry)
+    revoke_cached_token(user.jti, expires_at)
 
     # Audit log
     audit_entry = AuditLog(
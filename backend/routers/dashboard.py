@@ -7,7 +7,7 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload, Session
-from core.dependencies import get_current_user, get_db_session, UserContext
+from core.dependencies import get_current_user, get_read_db_session, UserContext
 from models.models import Appointment, Doctor, Room, Clinic, CalendarSlot, Staff
 from config import SLOTS_PER_DAY
 import logging
@@ -25,7 +25,7 @@ _dashboard_cache: dict[str, dict] = {}
 @router.get("/stats")
 def get_dashboard_stats(
     user: UserContext = Depends(get_current_user),
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_read_db_session),
 ):
     """Comprehensive dashboard statistics — tenant-scoped and authenticated."""
     tenant_id = user.tenant_id
@@ -11,7 +11,7 @@ from uuid import UUID
 from datetime import date as dt_date
 from models.models import Patient, Clinic, TokenBlacklist, LoginAttempt, AuditLog
 from core.auth import (
-    hash_password, verify_password, create_access_token,
+    hash_password, verify_password, password_needs_rehash, create_access_token,
     check_login_rate_limit, reset_login_attempts
 )
 from core.dependencies import get_current_user, get_db_session
@@ -123,8 +123,10 @@ def login_patient(data: PatientLogin, db: Session = Depends(get_db_session)):
     if not patient or not patient.hashed_password or not verify_password(data.password, patient.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    # 4. Success — reset rate limiter
+    # 4. Success — reset rate limiter, upgrade legacy bcrypt hash
     reset_login_attempts(db, data.email)
+    if password_needs_rehash(patient.hashed_password):
+        patient.hashed_password = hash_password(data.password)
 
     # 5. Create token — tenant_id may be None for global patients
     tenant_id_str = str(patient.tenant_id) if patient.tenant_id else ""
@@ -4,6 +4,7 @@ NEVER routes to scheduling without validated clinical intent.
 Tenant-scoped and authenticated.
 """
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional, List
 from sqlalchemy.orm import Session
 
@@ -24,7 +25,7 @@ router = APIRouter()
     Depends(AuthenticatedRateLimit(limit=RATE_LIMIT_CHATBOT, window=3600, scope="user")),
     Depends(AuthenticatedRateLimit(limit=RATE_LIMIT_TENANT_CHATBOT, window=86400, scope="tenant"))
 ])
-def analyze_symptoms(
+async def analyze_symptoms(
     data: TriageRequest,
     user: UserContext = Depends(get_current_user),
     db: Session = Depends(get_db_session),
@@ -34,6 +35,7 @@ def analyze_symptoms(
     1. Multi-condition extraction (intent_analyzer) with chat history context
     2. Clinical issue routing (orchestration_engine)
     3. Emergency escalation (emergency_handler)
+    The LLM call is awaited on the event loop; sync DB work runs in the threadpool.
     """
     from core.orchestration_engine import orchestrate
 
@@ -43,10 +45,10 @@ def analyze_symptoms(
         history_dicts = [{"role": m.role, "content": m.content} for m in data.history]
 
     # 1. Intent Analysis (with chat history)
-    intent = analyze_intent(data.symptoms, history_dicts, data.structured_data)
+    intent = await analyze_intent(data.symptoms, history_dicts, data.structured_data)
 
     # 2. Orchestration
-    plan = orchestrate(db, intent, tenant_id=user.tenant_id)
+    plan = await run_in_threadpool(orchestrate, db, intent, tenant_id=user.tenant_id)
 
     # 3. Build Response
     response_payload = plan.to_dict()
@@ -55,7 +57,7 @@ def analyze_symptoms(
     if plan.suggested_action == "ESCALATE":
         emergency_slot = None
         try:
-            emergency_slot = handle_emergency(db, tenant_id=user.tenant_id)
+            emergency_slot = await run_in_threadpool(handle_emergency, db, tenant_id=user.tenant_id)
         except Exception as e:
             logger.warning(f"DB unavailable for emergency lookup: {e}")
 
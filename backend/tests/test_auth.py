@@ -1,14 +1,24 @@
+import bcrypt
+import hmac
 import pytest
+import time
 import uuid
+import jwt
+import orjson
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from backend.main import app
 from core.db import Base, get_db
-from models.models import User, Clinic, AuditLog, TokenBlacklist
-from core.auth import hash_password, create_access_token
-from config import DATABASE_URL
+from models.models import User, Clinic, AuditLog, TokenBlacklist, Patient
+from core.auth import (
+    hash_password, verify_password, password_needs_rehash,
+    create_access_token, decode_token,
+    _b64url_encode, _fast_encode_hs256, _fast_decode_hs256,
+)
+from core.dependencies import _redis, _REVOKED_JTIS_KEY, _REVOKED_VERSION_KEY
+from config import DATABASE_URL, JWT_SECRET
 
 # Use the actual DB for testing, but we'll try to be somewhat careful
 # Ideally we'd validte against a test DB, but per instructions we use the running environment.
@@ -97,6 +107,37 @@ def test_register_login_flow(client, db_session):
     response = client.get("/api/auth/me", headers=headers)
     assert response.status_code == 401
 
+def test_revocation_from_another_worker_is_enforced(client):
+    email = f"revoke_{uuid.uuid4()}@example.com"
+    response = client.post("/api/auth/register", json={
+        "clinic_name": f"Revoke Clinic {uuid.uuid4()}", "email": email,
+        "password": "SecurePassword123!", "full_name": "Revoke Admin",
+    })
+    token = response.json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    # Publish the logout the way another worker's revoke_cached_token would
+    payload = decode_token(token)
+    _redis.zadd(_REVOKED_JTIS_KEY, {payload["jti"]: payload["exp"]})
+    _redis.incr(_REVOKED_VERSION_KEY)
+
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+def test_token_without_exp_is_accepted(client):
+    email = f"noexp_{uuid.uuid4()}@example.com"
+    response = client.post("/api/auth/register", json={
+        "clinic_name": f"No Exp Clinic {uuid.uuid4()}", "email": email,
+        "password": "SecurePassword123!", "full_name": "No Exp Admin",
+    })
+    claims = decode_token(response.json()["token"])
+    del claims["exp"]
+    headers = {"Authorization": f"Bearer {_fast_encode_hs256(claims)}"}
+
+    response = client.get("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == email
+
 def test_tenant_isolation(client, db_session):
     # Create Tenant A
     email_a = f"tenant_a_{uuid.uuid4()}@example.com"
@@ -127,3 +168,123 @@ def test_tenant_isolation(client, db_session):
     # Tenant B lists patients - should be empty (or at least not contain Patient A)
     resp_list = client.get("/api/patients/", headers=headers_b)
     assert len(resp_list.json()) == 0
+
+
+# ── Fast-path HS256 JWT ─────────────────────────────────────────────────────
+
+def _signed_token(header: dict, payload: dict) -> str:
+    """Hand-build a correctly signed token with an arbitrary header."""
+    signing_input = (
+        _b64url_encode(orjson.dumps(header)) + b"." + _b64url_encode(orjson.dumps(payload))
+    )
+    sig = hmac.digest(JWT_SECRET.encode("utf-8"), signing_input, "sha256")
+    return (signing_input + b"." + _b64url_encode(sig)).decode("ascii")
+
+def test_fast_jwt_round_trip():
+    token = create_access_token("user-1", "tenant-1", "admin")
+    payload = decode_token(token)
+    assert payload["sub"] == "user-1"
+    assert payload["tenant_id"] == "tenant-1"
+    assert payload["role"] == "admin"
+    assert payload["exp"] > time.time()
+
+def test_fast_jwt_rejects_tampered_signature():
+    token = _fast_encode_hs256({"sub": "user-1", "exp": int(time.time()) + 60})
+    head, body, sig = token.split(".")
+    tampered = f"{head}.{body}.{'A' if sig[0] != 'A' else 'B'}{sig[1:]}"
+    with pytest.raises(jwt.InvalidSignatureError):
+        _fast_decode_hs256(tampered)
+
+    forged_body = _b64url_encode(b'{"sub":"user-2"}').decode("ascii")
+    with pytest.raises(jwt.InvalidSignatureError):
+        _fast_decode_hs256(f"{head}.{forged_body}.{sig}")
+
+@pytest.mark.parametrize("alg", ["HS512", "none", None])
+def test_fast_jwt_rejects_other_algorithms(alg):
+    token = _signed_token({"alg": alg, "typ": "JWT"}, {"sub": "user-1"})
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        _fast_decode_hs256(token)
+
+def test_fast_jwt_rejects_expired_token():
+    token = _fast_encode_hs256({"sub": "user-1", "exp": int(time.time()) - 1})
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _fast_decode_hs256(token)
+
+@pytest.mark.parametrize("token", [
+    "",
+    "abc",
+    "a.b",
+    "a.b.c.d",
+    "!!!.???.***",
+    "é.é.é",
+    "eyJhbGciOiJIUzI1NiJ9.é.abc",
+])
+def test_fast_jwt_rejects_malformed_tokens(token):
+    with pytest.raises(jwt.DecodeError):
+        _fast_decode_hs256(token)
+
+def test_fast_jwt_interop_with_pyjwt():
+    claims = {"sub": "user-1", "tenant_id": "tenant-1", "exp": int(time.time()) + 60}
+
+    fast_token = _fast_encode_hs256(claims)
+    assert jwt.decode(fast_token, JWT_SECRET, algorithms=["HS256"]) == claims
+
+    pyjwt_token = jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+    assert _fast_decode_hs256(pyjwt_token) == claims
+
+
+# ── Password hashing: bcrypt → argon2id migration ──────────────────────────
+
+def _bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+def test_legacy_bcrypt_hash_still_verifies():
+    hashed = _bcrypt_hash("SecurePassword123!")
+    assert verify_password("SecurePassword123!", hashed)
+    assert not verify_password("WrongPassword123!", hashed)
+
+def test_password_needs_rehash():
+    assert password_needs_rehash(_bcrypt_hash("SecurePassword123!"))
+
+    fresh = hash_password("SecurePassword123!")
+    assert fresh.startswith("$argon2id$")
+    assert not password_needs_rehash(fresh)
+
+def test_staff_login_upgrades_bcrypt_hash(client, db_session):
+    email = f"bcrypt_{uuid.uuid4()}@example.com"
+    password = "SecurePassword123!"
+    response = client.post("/api/auth/register", json={
+        "clinic_name": f"Bcrypt Clinic {uuid.uuid4()}", "email": email,
+        "password": password, "full_name": "Legacy Admin",
+    })
+    assert response.status_code == 201
+
+    user = db_session.query(User).filter(User.email == email).one()
+    user.hashed_password = _bcrypt_hash(password)
+    db_session.commit()
+
+    response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$argon2id$")
+    assert verify_password(password, user.hashed_password)
+
+def test_patient_login_upgrades_bcrypt_hash(client, db_session):
+    email = f"bcrypt_patient_{uuid.uuid4()}@example.com"
+    password = "SecurePassword123!"
+    response = client.post("/api/auth/patient/register", json={
+        "name": "Legacy Patient", "email": email, "password": password,
+    })
+    assert response.status_code == 201
+
+    patient = db_session.query(Patient).filter(Patient.email == email).one()
+    patient.hashed_password = _bcrypt_hash(password)
+    db_session.commit()
+
+    response = client.post("/api/auth/patient/login", json={"email": email, "password": password})
+    assert response.status_code == 200
+
+    db_session.refresh(patient)
+    assert patient.hashed_password.startswith("$argon2id$")
+    assert verify_password(password, patient.hashed_password)
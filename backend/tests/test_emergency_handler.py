@@ -0,0 +1,107 @@
+import pytest
+import uuid
+from datetime import datetime, time
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.emergency_handler import handle_emergency
+from models.models import (
+    Clinic, Room, Doctor, Specialization, DoctorSpecialization,
+    AvailabilityTemplate, CalendarSlot,
+)
+from config import DATABASE_URL
+
+# Runs against the real DB like test_auth.py; every test gets its own clinic
+# so bookings never collide with existing data.
+
+# Monday 10:00 UTC → current_block 4, so the first bookable block today is 5.
+NOW = datetime(2031, 1, 6, 10, 0)
+TODAY = NOW.date()
+
+
+@pytest.fixture(scope="module")
+def db_session():
+    engine = create_engine(DATABASE_URL)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def tenant(db_session):
+    clinic = Clinic(clinic_id=uuid.uuid4(), name=f"Emergency Clinic {uuid.uuid4()}")
+    db_session.add(clinic)
+    db_session.flush()
+
+    spec = Specialization(tenant_id=clinic.clinic_id, name="General Dentist")
+    doctor = Doctor(doctor_id=uuid.uuid4(), tenant_id=clinic.clinic_id, name="Dr. Emergency")
+    room_a = Room(room_id=uuid.uuid4(), clinic_id=clinic.clinic_id, name="Room A", status="active")
+    room_b = Room(room_id=uuid.uuid4(), clinic_id=clinic.clinic_id, name="Room B", status="active")
+    db_session.add_all([spec, doctor, room_a, room_b])
+    db_session.flush()
+
+    db_session.add_all([
+        DoctorSpecialization(doctor_id=doctor.doctor_id, spec_id=spec.spec_id),
+        AvailabilityTemplate(
+            resource_id=doctor.doctor_id, resource_type="DOCTOR", clinic_id=clinic.clinic_id,
+            day_of_week=TODAY.weekday(), start_time=time(9, 0), end_time=time(17, 0),
+        ),
+    ])
+    db_session.commit()
+
+    yield {"clinic": clinic, "doctor": doctor, "room_a": room_a, "room_b": room_b}
+
+    db_session.rollback()
+    clinic_id = clinic.clinic_id
+    db_session.query(CalendarSlot).filter(CalendarSlot.tenant_id == clinic_id).delete()
+    db_session.query(AvailabilityTemplate).filter(AvailabilityTemplate.clinic_id == clinic_id).delete()
+    db_session.query(DoctorSpecialization).filter(DoctorSpecialization.doctor_id == doctor.doctor_id).delete()
+    db_session.query(Doctor).filter(Doctor.tenant_id == clinic_id).delete()
+    db_session.query(Specialization).filter(Specialization.tenant_id == clinic_id).delete()
+    db_session.query(Room).filter(Room.clinic_id == clinic_id).delete()
+    db_session.query(Clinic).filter(Clinic.clinic_id == clinic_id).delete()
+    db_session.commit()
+
+
+def _book(db, tenant, entity_type, entity_id, block):
+    db.add(CalendarSlot(
+        tenant_id=tenant["clinic"].clinic_id, entity_type=entity_type,
+        entity_id=entity_id, date=TODAY, time_block=block, booked=True,
+    ))
+    db.commit()
+
+
+def _emergency(db, tenant):
+    with patch("core.emergency_handler.datetime") as mock_dt:
+        mock_dt.utcnow.return_value = NOW
+        return handle_emergency(db, tenant_id=tenant["clinic"].clinic_id)
+
+
+def test_past_blocks_today_are_excluded(db_session, tenant):
+    result = _emergency(db_session, tenant)
+    assert result is not None
+    assert result["date"] == str(TODAY)
+    assert result["time_block"] == 5
+    assert result["time"] == "10:15"
+    assert result["doctor_id"] == str(tenant["doctor"].doctor_id)
+    assert result["room_id"] == str(tenant["room_a"].room_id)
+
+
+def test_booked_doctor_block_is_skipped(db_session, tenant):
+    _book(db_session, tenant, "doctor", tenant["doctor"].doctor_id, 5)
+
+    result = _emergency(db_session, tenant)
+    assert result["date"] == str(TODAY)
+    assert result["time_block"] == 6
+    assert result["room_id"] == str(tenant["room_a"].room_id)
+
+
+def test_booked_room_falls_through_to_free_room(db_session, tenant):
+    _book(db_session, tenant, "room", tenant["room_a"].room_id, 5)
+
+    result = _emergency(db_session, tenant)
+    assert result["time_block"] == 5
+    assert result["room_id"] == str(tenant["room_b"].room_id)
+    assert result["room_name"] == "Room B"
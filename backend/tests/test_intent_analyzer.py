@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+import pytest
+from unittest.mock import patch, MagicMock
+
+from core import intent_analyzer
+from core.intent_analyzer import _parse_duration_days
+
+
+# Expected values are what the original if-cascade returned for each input.
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("   ", None),
+    (3, 3),
+    (2.7, 2),
+    ("Less than 24 hours", 1),
+    ("started today", 1),
+    ("1-3 days", 2),
+    ("4-7 days", 5),
+    ("1-2 weeks", 10),
+    ("More than 2 weeks", 21),
+    ("a few months", 21),
+    ("30 seconds", 1),
+    ("a few minutes", 1),
+    ("several hours", 1),
+    ("2 months", 21),
+    ("10 days", 10),
+    ("since last week", None),
+    # Several phrases: the cascade's order decides, not position in the text
+    ("4-7 days, worse today", 1),
+    ("hours, over 1-3 days", 2),
+    ("months, flared up 1-2 weeks ago", 10),
+    ("minutes at a time for 4-7 days", 5),
+    ("more than 2 weeks, less than 24 hours since it got worse", 1),
+    ("1-3 days of pain, on and off for months", 2),
+])
+def test_parse_duration_days_matches_cascade(value, expected):
+    assert _parse_duration_days(value) == expected
+
+
+class _FakeStream:
+    """Stands in for the genai aio stream: yields text chunks."""
+
+    def __init__(self, pieces):
+        self._pieces = pieces
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for piece in self._pieces:
+            yield MagicMock(text=piece)
+
+    async def aclose(self):
+        pass
+
+
+def test_safety_fallback_is_not_cached():
+    async def generate_content_stream(**kwargs):
+        return _FakeStream(['{"issues": [], "note": "you need a ', 'root canal"}'])
+
+    client = MagicMock()
+    client.aio.models.generate_content_stream = generate_content_stream
+    # Unique text so no earlier test's cache entry can answer the second call
+    text = f"my lower molar has been aching when I chew, ref {uuid.uuid4()}"
+
+    with patch("core.intent_analyzer.GEMINI_API_KEY", "test-key"), \
+         patch("core.intent_analyzer._get_genai_client", return_value=client), \
+         patch("core.intent_analyzer._llm_analyze", wraps=intent_analyzer._llm_analyze) as llm:
+        first = asyncio.run(intent_analyzer.analyze_intent(text))
+        second = asyncio.run(intent_analyzer.analyze_intent(text))
+
+    assert first.action_type == "CLARIFY"
+    assert second.action_type == "CLARIFY"
+    assert llm.call_count == 2
@@ -0,0 +1,58 @@
+from core.intent_cache import LFUCache, make_key
+
+
+class TestLFUCache:
+    def test_evicts_least_frequently_used(self):
+        cache = LFUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_frequency_ties_evict_least_recent(self):
+        cache = LFUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("c", 3)
+        assert cache.get("a") is None
+        assert len(cache) == 2
+
+    def test_values_are_copied(self):
+        cache = LFUCache(4)
+        value = {"issues": []}
+        cache.put("k", value)
+        value["issues"].append("mutated")
+        hit = cache.get("k")
+        hit["issues"].append("mutated again")
+        assert cache.get("k") == {"issues": []}
+
+    def test_counts_hits_and_misses(self):
+        cache = LFUCache(4)
+        cache.get("k")
+        cache.put("k", 1)
+        cache.get("k")
+        cache.get("k")
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_key_normalizes_text_and_history():
+    history = [{"role": "user", "content": "My tooth hurts"}]
+    assert make_key("yes   please", history) == make_key("yes please", history)
+    assert make_key("my tooth hurts!!", history) == make_key("my tooth hurts", history)
+    assert make_key("yes", history) != make_key("yes", [])
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    import core.intent_cache as intent_cache
+    now = [1000.0]
+    monkeypatch.setattr(intent_cache.time, "monotonic", lambda: now[0])
+    cache = LFUCache(4, ttl=60)
+    cache.put("k", 1)
+    now[0] += 59
+    assert cache.get("k") == 1
+    now[0] += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
@@ -56,7 +56,7 @@ def test_multi_condition_orchestration(client, headers):
         )
         mock_llm.return_value = intent_res
 
-        response = client.post("/api/triage/analyze", json={"symptoms": "multiple issues"}, headers=headers)
+        response = client.post("/api/triage/analyze", json={"symptoms": "tooth pain and a wisdom tooth issue"}, headers=headers)
 
         assert response.status_code == 200
         data = response.json()
@@ -152,7 +152,7 @@ def test_post_llm_safety_validation(client, headers):
         )
         mock_llm.return_value = intent_res
 
-        response = client.post("/api/triage/analyze", json={"symptoms": "test"}, headers=headers)
+        response = client.post("/api/triage/analyze", json={"symptoms": "my tooth feels strange"}, headers=headers)
         data = response.json()
 
         assert data["suggested_action"] == "CLARIFY"
@@ -259,3 +259,28 @@ def test_sentiment_anxious_response(client, headers):
         assert data["suggested_action"] == "CLARIFY"
         assert "concerning" in data["message"].lower()
         assert data["patient_sentiment"] == "Anxious"
+
+
+def test_non_clinical_message_skips_llm(client, headers):
+    """
+    Test that a first message with no clinical signal is asked for the dental
+    concern without calling the LLM.
+    """
+    with patch("core.intent_analyzer._llm_analyze") as mock_llm:
+        response = client.post("/api/triage/analyze", json={"symptoms": "please schedule me"}, headers=headers)
+        data = response.json()
+
+        assert data["suggested_action"] == "CLARIFY"
+        assert not mock_llm.called
+
+
+def test_emergency_adjacent_message_reaches_llm(client, headers):
+    """
+    Test that a non-dental but emergency-adjacent first message is not
+    short-circuited: the LLM must see it to flag airway compromise.
+    """
+    with patch("core.intent_analyzer._llm_analyze") as mock_llm:
+        mock_llm.return_value = None
+        client.post("/api/triage/analyze", json={"symptoms": "my throat is closing up"}, headers=headers)
+
+        assert mock_llm.called